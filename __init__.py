@@ -74,10 +74,12 @@ if 'bpy' in locals():
 import bpy
 from bpy.props import PointerProperty, BoolProperty, EnumProperty
 from . properties import M3SceneProperties, M3ObjectProperties
-from . utils.registration import get_core, get_tools, get_pie_menus
+from . utils.registration import get_core, get_tools, get_pie_menus, get_prefs
+from . utils.developer import set_profiling
 from . utils.registration import register_classes, unregister_classes, register_keymaps, unregister_keymaps, register_icons, unregister_icons, register_msgbus, unregister_msgbus
 from . ui.menus import object_context_menu, mesh_context_menu, add_object_buttons, material_pick_button, outliner_group_toggles, extrude_menu, group_origin_adjustment_toggle, render_menu, render_buttons
 from . handlers import focus_HUD, surface_slide_HUD, update_group, update_asset, update_msgbus, screencast_HUD, increase_lights_on_render_end, decrease_lights_on_render_start, axes_HUD
+from . handlers import depsgraph_update, frame_change, reset_depsgraph_dispatcher, subscribe, unsubscribe, update_geometry_versions, update_box_index, update_snap_cache
 
 
 def register():
@@ -132,14 +134,25 @@ def register():
 
     # HANDLERS
 
-    bpy.app.handlers.load_post.append(update_msgbus)
+    set_profiling(get_prefs().profile_handlers)
 
-    bpy.app.handlers.depsgraph_update_post.append(axes_HUD)
-    bpy.app.handlers.depsgraph_update_post.append(focus_HUD)
-    bpy.app.handlers.depsgraph_update_post.append(surface_slide_HUD)
-    bpy.app.handlers.depsgraph_update_post.append(update_group)
-    bpy.app.handlers.depsgraph_update_post.append(update_asset)
-    bpy.app.handlers.depsgraph_update_post.append(screencast_HUD)
+    bpy.app.handlers.load_post.append(update_msgbus)
+    bpy.app.handlers.load_post.append(reset_depsgraph_dispatcher)
+    bpy.app.handlers.undo_post.append(reset_depsgraph_dispatcher)
+    bpy.app.handlers.redo_post.append(reset_depsgraph_dispatcher)
+
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+    bpy.app.handlers.frame_change_post.append(frame_change)
+
+    subscribe(axes_HUD, kinds={'OBJECT', 'SCENE'})
+    subscribe(focus_HUD, kinds={'SCENE'})
+    subscribe(surface_slide_HUD, kinds={'OBJECT', 'ACTIVE'})
+    subscribe(update_group, kinds={'OBJECT', 'SELECT', 'ACTIVE'})
+    subscribe(update_asset, kinds={'OBJECT'})
+    subscribe(screencast_HUD)
+    subscribe(update_geometry_versions, kinds={'GEOMETRY', 'MESH'})
+    subscribe(update_box_index, kinds={'OBJECT'})
+    subscribe(update_snap_cache, kinds={'GEOMETRY'})
 
     bpy.app.handlers.render_init.append(decrease_lights_on_render_start)
     bpy.app.handlers.render_cancel.append(increase_lights_on_render_end)
@@ -157,6 +170,9 @@ def unregister():
     # HANDLERS
 
     bpy.app.handlers.load_post.remove(update_msgbus)
+    bpy.app.handlers.load_post.remove(reset_depsgraph_dispatcher)
+    bpy.app.handlers.undo_post.remove(reset_depsgraph_dispatcher)
+    bpy.app.handlers.redo_post.remove(reset_depsgraph_dispatcher)
 
     from . handlers import axesHUD, focusHUD, surfaceslideHUD, screencastHUD
 
@@ -172,12 +188,18 @@ def unregister():
     if screencastHUD and "RNA_HANDLE_REMOVED" not in str(screencastHUD):
         bpy.types.SpaceView3D.draw_handler_remove(screencastHUD, 'WINDOW')
 
-    bpy.app.handlers.depsgraph_update_post.remove(axes_HUD)
-    bpy.app.handlers.depsgraph_update_post.remove(focus_HUD)
-    bpy.app.handlers.depsgraph_update_post.remove(surface_slide_HUD)
-    bpy.app.handlers.depsgraph_update_post.remove(update_group)
-    bpy.app.handlers.depsgraph_update_post.remove(update_asset)
-    bpy.app.handlers.depsgraph_update_post.remove(screencast_HUD)
+    bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update)
+    bpy.app.handlers.frame_change_post.remove(frame_change)
+
+    unsubscribe(axes_HUD)
+    unsubscribe(focus_HUD)
+    unsubscribe(surface_slide_HUD)
+    unsubscribe(update_group)
+    unsubscribe(update_asset)
+    unsubscribe(screencast_HUD)
+    unsubscribe(update_geometry_versions)
+    unsubscribe(update_box_index)
+    unsubscribe(update_snap_cache)
 
     bpy.app.handlers.render_init.remove(decrease_lights_on_render_start)
     bpy.app.handlers.render_cancel.remove(increase_lights_on_render_end)
@@ -1,22 +1,30 @@
 import bpy
 from bpy.app.handlers import persistent
-from . utils.draw import draw_axes_HUD, draw_focus_HUD, draw_surface_slide_HUD, draw_screen_cast_HUD
+from . utils.draw import draw_axes_HUD, draw_focus_HUD, draw_surface_slide_HUD, draw_screen_cast_HUD, axes_buffer
 from . utils.registration import get_prefs, reload_msgbus, get_addon
-from . utils.group import update_group_name, select_group_children
+from . utils.group import update_group_name, select_group_children, update_group_empties, invalidate_group_empties
 from . utils.light import adjust_lights_for_rendering, get_area_light_poll
 from . utils.view import sync_light_visibility
+from . utils.asset import get_asset_stashes_and_backups
+from . utils.developer import profile
+from . utils.bvh import bump_geometry_version, bvh_cache
+from . utils.raycast import box_index
+from . utils.snap import snap_cache
+from . utils.graph import clear_mesh_graphs
+from . utils.mesh import clear_coords_cache
 
 import time
+import traceback
 
 
 axesHUD = None
-prev_axes_objects = []
 focusHUD = None
 surfaceslideHUD = None
 screencastHUD = None
 
 meshmachine = None
 decalmachine = None
+last_asset_drop = None
 
 
 @persistent
@@ -24,19 +32,218 @@ def update_msgbus(none):
     reload_msgbus()
 
 
+# DEPSGRAPH DISPATCHER
+
+subscribers = []
+
+prev_scene = None
+prev_active = None
+prev_selected = set()
+
+
+class DepsgraphUpdates:
+    '''
+    summary of a single depsgraph update, collected once by the dispatcher and shared by all subscribed feature callbacks
+    all IDs are the original (non-evaluated) IDs, so they can be compared against context.active_object, context.selected_objects, etc.
+    '''
+
+    def __init__(self, scene, depsgraph):
+        self.scene = scene
+        self.depsgraph = depsgraph
+
+        self.objects = set()
+        self.geometry = set()
+        self.transform = set()
+        self.meshes = set()
+
+        self.active = None
+        self.selected = set()
+        self.deselected = set()
+
+        self.kinds = set()
+
+
+def subscribe(callback, kinds=None):
+    '''
+    subscribe a feature callback to the depsgraph dispatcher
+    the callback is passed the scene and the DepsgraphUpdates, but only if any of the update kinds it is subscribed to are present
+    use kinds=None to have it called on every depsgraph update
+
+    kinds: OBJECT, GEOMETRY, TRANSFORM, MESH, SCENE, ACTIVE, SELECT
+    '''
+
+    unsubscribe(callback)
+    subscribers.append((callback, set(kinds) if kinds else None))
+
+
+def unsubscribe(callback):
+    for sub in [sub for sub in subscribers if sub[0] == callback]:
+        subscribers.remove(sub)
+
+
+def get_depsgraph_updates(scene, depsgraph):
+    '''
+    read depsgraph.updates once, and sort the changed IDs by kind
+    the selection is only compared when the scene itself was updated, which is what selection changes tag
+    '''
+
+    global prev_scene, prev_active, prev_selected
+
+    updates = DepsgraphUpdates(scene, depsgraph)
+
+    for update in depsgraph.updates:
+        id = update.id.original
+
+        if isinstance(id, bpy.types.Object):
+            updates.objects.add(id)
+
+            if update.is_updated_geometry:
+                updates.geometry.add(id)
+
+            if update.is_updated_transform:
+                updates.transform.add(id)
+
+        elif isinstance(id, bpy.types.Mesh):
+            updates.meshes.add(id)
+
+        elif isinstance(id, bpy.types.Scene):
+            updates.kinds.add('SCENE')
+
+    if updates.objects:
+        updates.kinds.add('OBJECT')
+
+    if updates.geometry:
+        updates.kinds.add('GEOMETRY')
+
+    if updates.transform:
+        updates.kinds.add('TRANSFORM')
+
+    if updates.meshes:
+        updates.kinds.add('MESH')
+
+
+    # scene switches invalidate whatever was tracked before
+
+    if scene != prev_scene:
+        prev_scene = scene
+        prev_active = None
+        prev_selected = set()
+
+        updates.kinds.update({'SCENE', 'ACTIVE', 'SELECT'})
+
+
+    # ACTIVE
+
+    # avoid AttributeError: 'Context' object has no attribute 'active_object'
+    updates.active = getattr(bpy.context, 'active_object', None)
+
+    if updates.active != prev_active:
+        prev_active = updates.active
+        updates.kinds.add('ACTIVE')
+
+
+    # SELECTION
+
+    if 'SCENE' in updates.kinds:
+        selected = set(getattr(bpy.context, 'selected_objects', []))
+
+        updates.selected = selected - prev_selected
+        updates.deselected = prev_selected - selected
+
+        if updates.selected or updates.deselected:
+            prev_selected = selected
+            updates.kinds.add('SELECT')
+
+    return updates
+
+
+@persistent
+@profile
+def depsgraph_update(scene, depsgraph):
+    '''
+    the only depsgraph_update_post handler, routing the changed IDs to the subscribed feature callbacks
+    '''
+
+    updates = get_depsgraph_updates(scene, depsgraph)
+
+    for callback, kinds in subscribers:
+        if kinds is None or kinds & updates.kinds:
+
+            # keep a failing feature from taking down all the others subscribed after it
+            try:
+                callback(scene, updates)
+
+            except Exception:
+                print(f"\nMACHIN3tools: {callback.__name__}() failed in the depsgraph dispatcher")
+                traceback.print_exc()
+
+
+@persistent
+@profile
+def frame_change(scene, depsgraph):
+    '''
+    the frame_change_post handler, as frame changes during playback and scrubbing don't run through depsgraph_update_post
+    refresh whatever the dispatcher keeps current, and what animated objects can change without it
+    '''
+
+    # any object's world space box can change with the frame, through animation, drivers, constraints or parenting, so rebuild them on the next query
+    box_index.clear()
+
+    # evaluated snapping geometry changes with the frame on armature, shape key or modifier animated meshes
+    snap_cache.invalidate_evaluated()
+
+    # removed objects are dropped first, so all remaining rows can be read
+    if axes_buffer.objects:
+        axes_buffer.update_visibility()
+        axes_buffer.update_matrices(axes_buffer.objects)
+
+
 @persistent
-def update_group(none):
+def reset_depsgraph_dispatcher(none):
+    '''
+    run on file load, as well as after undo and redo, which can invalidate all object references held by the dispatcher and the indexes it maintains
+    '''
+
+    global prev_scene, prev_active, prev_selected
+
+    prev_scene = None
+    prev_active = None
+    prev_selected = set()
+
+    invalidate_group_empties()
+    box_index.clear()
+    snap_cache.clear()
+    bvh_cache.clear()
+    clear_mesh_graphs()
+    clear_coords_cache()
+
+    # rebuild right away, as the axes HUD draws from the buffer, and there may not be another depsgraph update for a while
+    scene = getattr(bpy.context, 'scene', None)
+
+    if scene and axes_buffer.scene:
+        axes_buffer.build(scene)
+
+    else:
+        axes_buffer.clear()
+
+
+# FEATURES
+
+@profile
+def update_group(scene, updates):
     context = bpy.context
 
     if context.mode == 'OBJECT':
 
-        # avoid AttributeError: 'Context' object has no attribute 'active_object'
-        active = context.active_object if getattr(context, 'active_object', None) and context.active_object.M3.is_group_empty and context.active_object.select_get() else None
+        # only the group empties, whose selection actually flipped are touched below
+        flipped = update_group_empties(scene, context.view_layer, objects=updates.objects, selection=updates.selected | updates.deselected)
+
+        active = updates.active if updates.active and updates.active.M3.is_group_empty and updates.active.select_get() else None
 
 
         # AUTO SELECT
 
-        if context.scene.M3.group_select and active:
+        if context.scene.M3.group_select and active and (active in flipped or 'ACTIVE' in updates.kinds):
             select_group_children(context.view_layer, active, recursive=context.scene.M3.group_recursive_select)
 
 
@@ -50,17 +257,16 @@ def update_group(none):
 
         # HIDE / UNHIDE
 
-        if context.scene.M3.group_hide and getattr(context, 'visible_objects', None):
-            selected = [obj for obj in context.visible_objects if obj.M3.is_group_empty and obj.select_get()]
-            unselected = [obj for obj in context.visible_objects if obj.M3.is_group_empty and not obj.select_get()]
+        if context.scene.M3.group_hide and flipped:
+            for group in flipped:
+                if not group.visible_get():
+                    continue
 
-            if selected:
-                for group in selected:
+                if group.select_get():
                     group.show_name = True
                     group.empty_display_size = group.M3.group_size
 
-            if unselected:
-                for group in unselected:
+                else:
                     group.show_name = False
 
                     # store existing non-zero size
@@ -70,9 +276,9 @@ def update_group(none):
                     group.empty_display_size = 0.0001
 
 
-@persistent
-def update_asset(none):
-    global meshmachine, decalmachine
+@profile
+def update_asset(scene, updates):
+    global meshmachine, decalmachine, last_asset_drop
 
     if meshmachine is None:
         meshmachine = get_addon('MESHmachine')[0]
@@ -83,9 +289,7 @@ def update_asset(none):
     context = bpy.context
 
     if context.mode == 'OBJECT':
-
-        # avoid AttributeError: 'Context' object has no attribute 'active_object'
-        active = getattr(context, 'active_object', None)
+        active = updates.active
 
         operators = context.window_manager.operators
 
@@ -93,20 +297,21 @@ def update_asset(none):
             lastop = operators[-1]
 
             if (meshmachine or decalmachine) and lastop.bl_idname == 'OBJECT_OT_transform_to_mouse':
-                # print("inserting an asset")
-                # start = time.time()
 
-                # for obj in context.scene.objects:
-                for obj in context.visible_objects:
-                    if meshmachine and obj.MM.isstashobj:
-                        # print(" STASH!")
+                # the operator stays the last one for many more depsgraph updates, but each asset drop only needs to be processed once
+                drop = (lastop.as_pointer(), active.as_pointer())
 
-                        for col in obj.users_collection:
-                            # print(f"  unlinking {obj.name} from {col.name}")
-                            col.objects.unlink(obj)
+                if drop == last_asset_drop:
+                    return
+
+                last_asset_drop = drop
+
+                # print("inserting an asset")
+                # start = time.time()
 
-                    if decalmachine and obj.DM.isbackup:
-                        # print(" DECAL BACKUP!")
+                for obj in get_asset_stashes_and_backups(active.instance_collection, meshmachine=meshmachine, decalmachine=decalmachine):
+                    if obj.visible_get():
+                        # print(" STASH or DECAL BACKUP!")
 
                         for col in obj.users_collection:
                             # print(f"  unlinking {obj.name} from {col.name}")
@@ -115,52 +320,80 @@ def update_asset(none):
                 # print(f" MACHIN3tools asset drop check done, after {time.time() - start:.20f} seconds")
 
 
-@persistent
-def axes_HUD(scene):
-    global axesHUD, prev_axes_objects
+@profile
+def axes_HUD(scene, updates):
+    global axesHUD
 
     # if you unregister the addon, the handle will somehow stay arround as a capsule object with the following name
     # despite that, the object will return True, and so we need to check for this or no new handler will be created when re-registering
     if axesHUD and "RNA_HANDLE_REMOVED" in str(axesHUD):
         axesHUD = None
 
-    axes_objects = [obj for obj in getattr(bpy.context, 'visible_objects', []) if obj.M3.draw_axes]
-    active = getattr(bpy.context, 'active_object', None)
 
-    if scene.M3.draw_active_axes and active and active not in axes_objects:
-        axes_objects.append(active)
+    # keep the axes buffer current, objects toggling draw_axes are added/removed by the property's update function
+
+    if axes_buffer.scene != scene.name:
+        axes_buffer.build(scene)
 
-    if scene.M3.draw_cursor_axes:
-        axes_objects.append('CURSOR')
+    else:
+        # newly added objects, that have draw_axes enabled already, like duplicates
+        for obj in updates.objects:
+            if obj not in axes_buffer.rows and obj.M3.draw_axes:
+                axes_buffer.add(obj)
 
-    # print()
+        if updates.transform:
+            axes_buffer.update_matrices(updates.transform)
 
-    if axes_objects:
-        # print("axes objects present")
+        if 'SCENE' in updates.kinds:
+            axes_buffer.update_visibility()
 
-        if axes_objects != prev_axes_objects:
-            # print(" axes objects changed")
-            prev_axes_objects = axes_objects
 
-            # the objects have changed, remove the previous handler if one exists
-            if axesHUD:
-                # print("  removing previous draw handler")
-                bpy.types.SpaceView3D.draw_handler_remove(axesHUD, 'WINDOW')
+    # the draw handler reads from the buffer directly, so it only needs to be added or removed, but never re-created
 
-            # create a new handler
+    if axes_buffer.objects or scene.M3.draw_active_axes or scene.M3.draw_cursor_axes:
+        if not axesHUD:
             # print("  adding new draw handler")
-            axesHUD = bpy.types.SpaceView3D.draw_handler_add(draw_axes_HUD, (bpy.context, axes_objects), 'WINDOW', 'POST_VIEW')
+            axesHUD = bpy.types.SpaceView3D.draw_handler_add(draw_axes_HUD, (bpy.context, ), 'WINDOW', 'POST_VIEW')
 
     # remove the handler when no axes objects are present anymore
     elif axesHUD:
         bpy.types.SpaceView3D.draw_handler_remove(axesHUD, 'WINDOW')
         # print("removing old draw handler")
         axesHUD = None
-        prev_axes_objects = []
 
 
-@persistent
-def focus_HUD(scene):
+@profile
+def update_geometry_versions(scene, updates):
+    '''
+    stamp meshes, whose geometry changed, so cached BVHs, snapping data, etc. built from them are invalidated
+    '''
+
+    meshes = {obj.data for obj in updates.geometry if obj.type == 'MESH'} | updates.meshes
+
+    for mesh in meshes:
+        bump_geometry_version(mesh)
+
+
+@profile
+def update_box_index(scene, updates):
+    '''
+    mark the bounding boxes of transformed, changed and added objects dirty, so only those are recomputed by the raycasting broadphase
+    '''
+
+    box_index.invalidate(updates.objects)
+
+
+@profile
+def update_snap_cache(scene, updates):
+    '''
+    drop the cached snapping geometry of objects, whose evaluated geometry changed, including modifier stack changes
+    '''
+
+    snap_cache.invalidate(updates.geometry)
+
+
+@profile
+def focus_HUD(scene, updates):
     global focusHUD
 
     # if you unregister the addon, the handle will somehow stay arround as a capsule object with the following name
@@ -179,8 +412,8 @@ def focus_HUD(scene):
         focusHUD = None
 
 
-@persistent
-def surface_slide_HUD(scene):
+@profile
+def surface_slide_HUD(scene, updates):
     global surfaceslideHUD
 
     # if you unregister the addon, the handle will somehow stay arround as a capsule object with the following name
@@ -188,8 +421,11 @@ def surface_slide_HUD(scene):
     if surfaceslideHUD and "RNA_HANDLE_REMOVED" in str(surfaceslideHUD):
         surfaceslideHUD = None
 
-    # avoid AttributeError: 'Context' object has no attribute 'active_object'
-    active = getattr(bpy.context, 'active_object', None)
+    active = updates.active
+
+    # only the active's modifier stack matters, so there's nothing to do if it's neither new nor changed
+    if 'ACTIVE' not in updates.kinds and active not in updates.objects:
+        return
 
     if active:
         surfaceslide = [mod for mod in active.modifiers if mod.type == 'SHRINKWRAP' and 'SurfaceSlide' in mod.name]
@@ -202,8 +438,8 @@ def surface_slide_HUD(scene):
             surfaceslideHUD = None
 
 
-@persistent
-def screencast_HUD(scene):
+@profile
+def screencast_HUD(scene, updates):
     global screencastHUD
 
     wm = bpy.context.window_manager
@@ -1,6 +1,6 @@
 import bpy
 from . utils import registration as r
-from . utils.group import update_group_name
+from . utils.group import update_group_name, invalidate_group_empties
 
 
 def group_name_change():
@@ -18,3 +18,7 @@ def group_color_change():
 
         for obj in objects:
             obj.color = active.color
+
+
+def group_empty_change():
+    invalidate_group_empties()
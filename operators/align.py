@@ -455,7 +455,7 @@ class AlignRelative(bpy.types.Operator):
         # create batches for VIEW3D preview
         for obj in self.targets:
             if obj not in self.batches:
-                self.batches[obj] = [get_coords(aligner.data, obj.matrix_world @ self.deltamx[aligner], indices=True) for aligner in self.aligners if aligner.data]
+                self.batches[obj] = [get_coords(aligner.data, obj.matrix_world @ self.deltamx[aligner], indices=True, cache=True) for aligner in self.aligners if aligner.data]
 
         events = ['MOUSEMOVE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE']
 
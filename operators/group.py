@@ -1,7 +1,7 @@
 import bpy
 from bpy.props import EnumProperty, BoolProperty
 from .. utils.object import parent, unparent
-from .. utils.group import group, ungroup, get_group_matrix, select_group_children, get_child_depth, clean_up_groups, fade_group_sizes
+from .. utils.group import group, ungroup, get_group_matrix, select_group_children, get_child_depth, clean_up_groups, fade_group_sizes, invalidate_group_empties
 from .. utils.collection import get_collection_depth
 from .. utils.registration import get_prefs
 from .. utils.modifier import get_mods_as_dict, add_mods_from_dict
@@ -276,6 +276,9 @@ class Groupify(bpy.types.Operator):
         # groupify all the way down
         self.groupify(empties)
 
+        # msgbus doesn't fire for is_group_empty changes done in Python, so the group empty index has to be invalidated here
+        invalidate_group_empties()
+
         # fade group sizes
         if get_prefs().group_fade_sizes:
             fade_group_sizes(context, init=True)
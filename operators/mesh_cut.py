@@ -2,7 +2,7 @@ import bpy
 from bpy.props import BoolProperty
 import bmesh
 from math import degrees
-from .. utils.mesh import unhide_deselect, join
+from .. utils.mesh import unhide_deselect_meshes, join
 from .. utils.object import flatten
 from .. utils.ui import popup_message
 
@@ -42,8 +42,7 @@ class MeshCut(bpy.types.Operator):
             cutter = cutters[0]
 
             # unhide both
-            unhide_deselect(target.data)
-            unhide_deselect(cutter.data)
+            unhide_deselect_meshes([target.data, cutter.data])
 
             # get depsgraph
             dg = context.evaluated_depsgraph_get()
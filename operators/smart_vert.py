@@ -3,12 +3,12 @@ from bpy.props import EnumProperty, BoolProperty, IntProperty
 from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d, region_2d_to_location_3d
 import bmesh
 from mathutils import Vector
-from mathutils.geometry import intersect_point_line, intersect_line_line, intersect_line_plane
-from .. utils.graph import get_shortest_path
+from mathutils.geometry import intersect_line_line, intersect_line_plane
+from .. utils.graph import get_shortest_paths
 from .. utils.ui import popup_message, init_status, finish_status
 from .. utils.draw import draw_line, draw_lines, draw_point, draw_tris, draw_vector
 from .. utils.snap import Snap
-from .. utils.math import average_locations, get_center_between_verts, get_face_center
+from .. utils.math import average_locations
 from .. utils.selection import get_edges_vert_sequences, get_selection_islands
 from .. utils.registration import get_addon
 from .. utils.system import printd
@@ -568,7 +568,7 @@ class SmartVert(bpy.types.Operator):
                     history = self.validate_history(active, bm)
 
                     if history:
-                        path1, path2 = self.get_paths(bm, history, topo)
+                        path1, path2 = self.get_paths(active, bm, history, topo)
                         self.merge_paths(active, bm, path1, path2)
                         return True
 
@@ -580,7 +580,7 @@ class SmartVert(bpy.types.Operator):
                 history = self.validate_history(active, bm)
 
                 if history:
-                    path1, path2 = self.get_paths(bm, history, topo)
+                    path1, path2 = self.get_paths(active, bm, history, topo)
 
                     self.connect(active, bm, path1, path2)
                     return True
@@ -597,21 +597,19 @@ class SmartVert(bpy.types.Operator):
             return history
         return None
 
-    def get_paths(self, bm, history, topo):
+    def get_paths(self, active, bm, history, topo):
         pair1 = history[0:2]
         pair2 = history[2:4]
         pair2.reverse()
 
-        path1 = get_shortest_path(bm, *pair1, topo=topo, select=True)
-        path2 = get_shortest_path(bm, *pair2, topo=topo, select=True)
+        path1, path2 = get_shortest_paths(bm, [pair1, pair2], topo=topo, select=True, mesh=active.data)
 
         # in some rare situations with TOPO pathtype, a verts can end up in both paths, which will cause an exception later one
         is_any_in_both = any(v in path2 for v in path1)
 
         # so check for that and get the paths again with the other path type
         if is_any_in_both:
-            path1 = get_shortest_path(bm, *pair1, topo=not topo, select=True)
-            path2 = get_shortest_path(bm, *pair2, topo=not topo, select=True)
+            path1, path2 = get_shortest_paths(bm, [pair1, pair2], topo=not topo, select=True, mesh=active.data)
 
             self.pathtype = step_enum(self.pathtype, smartvert_path_type_items, step=1, loop=True)
 
@@ -779,27 +777,9 @@ class SmartVert(bpy.types.Operator):
         '''
 
         hitmx = self.S.hitmx
-        hit_co = hitmx.inverted_safe() @ self.S.hitlocation
 
-        hitface = self.S.hitface
-        tri_coords = self.S.cache.tri_coords[self.S.hitobj.name][self.S.hitindex]
-
-
-        # weigh the following distances, to influence how easily the individual elements can be selected
-        face_weight = 25
-        edge_weight = 1
-
-        # get distance to face center
-        face_distance = (hitface, (hit_co - hitface.calc_center_median_weighted()).length / face_weight)
-
-        # evaluate all hitface edges and get their proximity to the hit, as well as the proximity to the hit from the edge center
-        # get the closest edge by multiplying the distance with the center distance, and divide the result by the edge length, this is necessary to deal with split edges
-        # edge = min([(e, (hit - intersect_point_line(hit, e.verts[0].co, e.verts[1].co)[0]).length, (hit - get_center_between_verts(*e.verts)).length) for e in hitface.edges if e.calc_length()], key=lambda x: (x[1] * x[2]) / x[0].calc_length())[0]
-        edge = min([(e, (hit_co - intersect_point_line(hit_co, e.verts[0].co, e.verts[1].co)[0]).length, (hit_co - get_center_between_verts(*e.verts)).length) for e in hitface.edges if e.calc_length()], key=lambda x: (x[1] * x[2]) / x[0].calc_length())
-        edge_distance = (edge[0], ((edge[1] * edge[2]) / edge[0].calc_length()) / edge_weight)
-
-        # based on the two distances get the closest edge or face
-        closest = min([face_distance, edge_distance], key=lambda x: x[1])
+        # snap to an edge within reach of the mouse, or to the hitface otherwise
+        self.S.get_element(context, self.mousepos, radius=20 * context.preferences.view.ui_scale, elements={'EDGE', 'FACE'})
 
         # initialize all coords
         self.snap_coords = []
@@ -807,11 +787,11 @@ class SmartVert(bpy.types.Operator):
         self.snap_proximity_coords = []
         self.snap_ortho_coords = []
 
-        if isinstance(closest[0], bmesh.types.BMEdge):
+        if self.S.snap_element == 'EDGE':
             self.snap_element = 'EDGE'
 
             # set snap coords for view3d drawing
-            self.snap_coords = [hitmx @ v.co for v in closest[0].verts]
+            self.snap_coords = self.S.snap_coords
 
             # get snap coords in active's local space
             snap_coords = [self.mx.inverted_safe() @ co for co in self.snap_coords]
@@ -836,7 +816,12 @@ class SmartVert(bpy.types.Operator):
                 else:
                     i = intersect_line_line(init_co, target.co, *snap_coords)
 
-                    v.co = i[1 if self.is_diverging else 0] if i else init_co
+                    # degenerate slide or snap edges have no intersection
+                    if i is None:
+                        v.co = init_co
+                        continue
+
+                    v.co = i[1 if self.is_diverging else 0]
 
                     # add coords to draw the slide 'edges'
                     if v.co != target.co:
@@ -850,14 +835,16 @@ class SmartVert(bpy.types.Operator):
                     if v.co != i[1]:
                         self.snap_ortho_coords.extend([v.co, i[1]])
 
-        elif isinstance(closest[0], bmesh.types.BMFace):
+        elif self.S.snap_element == 'FACE':
             self.snap_element = 'FACE'
 
             foundintersection = False
 
+            hitface = self.S.hitface
+
             # get face center and normal in active's local space
-            co = self.mx.inverted_safe() @ hitmx @ get_face_center(closest[0])
-            no = self.mx.inverted_safe().to_3x3() @ hitmx.to_3x3() @ closest[0].normal
+            co = self.mx.inverted_safe() @ hitmx @ hitface.center
+            no = self.mx.inverted_safe().to_3x3() @ hitmx.to_3x3() @ hitface.normal
 
             # get intersections of individual slide dirs and hitface
             for v, data in self.verts.items():
@@ -875,7 +862,7 @@ class SmartVert(bpy.types.Operator):
 
             # avoid drawing unnecessary faces
             if foundintersection:
-                self.snap_tri_coords = tri_coords
+                self.snap_tri_coords = self.S.snap_tri_coords
 
         if self.can_flatten:
 
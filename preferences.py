@@ -3,6 +3,7 @@ from bpy.props import IntProperty, StringProperty, BoolProperty, EnumProperty, F
 import os
 from . utils.ui import get_icon, draw_keymap_items, get_keymap_item
 from . utils.registration import activate, get_path, get_name, get_addon
+from . utils.developer import set_profiling, get_profiles
 from . items import preferences_tabs, matcap_background_type_items
 
 
@@ -18,6 +19,10 @@ has_sidebar = ['OT_smart_drive',
 draws_lines = ['OT_smart_vert',
                'OT_punch_it']
 
+uses_bvh_cache = ['OT_material_picker']
+
+uses_snap_cache = ['OT_smart_vert']
+
 has_hud = ['OT_material_picker',
            'OT_surface_slide',
            'OT_clean_up',
@@ -34,7 +39,7 @@ is_fading = ['OT_material_picker',
              'OT_group',
              'MT_tools_pie']
 
-has_settings = has_sidebar + draws_lines + has_hud + ['OT_smart_vert',
+has_settings = has_sidebar + draws_lines + uses_bvh_cache + uses_snap_cache + has_hud + ['OT_smart_vert',
                                                       'OT_clean_up',
                                                       'OT_punch_it',
                                                       'OT_transform_edge_constrained',
@@ -108,6 +113,12 @@ class MACHIN3toolsPreferences(bpy.types.AddonPreferences):
             self.auto_smooth_angle_presets = "10, 20, 30, 60, 180"
 
 
+    # PROFILING Updates
+
+    def update_profile_handlers(self, context):
+        set_profiling(self.profile_handlers)
+
+
     # TOOL ACTIVATION Updates
 
     def update_activate_smart_vert(self, context):
@@ -480,6 +491,18 @@ class MACHIN3toolsPreferences(bpy.types.AddonPreferences):
     mirror_flick_distance: IntProperty(name="Flick Distance", default=75, min=20, max=1000)
 
 
+    # CACHES
+
+    bvh_cache_budget: IntProperty(name="BVH Cache Budget (MB)", description="Memory the cached BVHs used for Raycasting may take up, before the least recently used ones are removed", default=256, min=16)
+    snap_cache_budget: IntProperty(name="Snap Cache Budget (MB)", description="Memory the cached Geometry used for Snapping may take up, before the least recently used ones are removed", default=256, min=16)
+
+
+    # PROFILING
+
+    profile_show: BoolProperty(name="Show Profiling Preferences", default=False)
+    profile_handlers: BoolProperty(name="Profile Handlers and HUD Draw Callbacks", description="Record Call Counts and Timings of MACHIN3tools' Depsgraph Handlers and HUD Draw Callbacks\nThis adds a small Overhead to every Call, so only enable it to find the Cause of Viewport Lag", default=False, update=update_profile_handlers)
+
+
     # hidden
 
     tabs: EnumProperty(name="Tabs", items=preferences_tabs, default="GENERAL")
@@ -681,7 +704,7 @@ class MACHIN3toolsPreferences(bpy.types.AddonPreferences):
 
         # VIEW 3D settings
 
-        if any([getattr(bpy.types, f'MACHIN3_{name}', False) for name in has_sidebar + draws_lines]):
+        if any([getattr(bpy.types, f'MACHIN3_{name}', False) for name in has_sidebar + draws_lines + uses_bvh_cache + uses_snap_cache]):
             bb = b.box()
             bb.label(text="View 3D")
 
@@ -693,6 +716,14 @@ class MACHIN3toolsPreferences(bpy.types.AddonPreferences):
                 column = bb.column()
                 column.prop(self, "use_legacy_line_smoothing")
 
+            if any([getattr(bpy.types, f'MACHIN3_{name}', False) for name in uses_bvh_cache]):
+                column = bb.column()
+                column.prop(self, "bvh_cache_budget")
+
+            if any([getattr(bpy.types, f'MACHIN3_{name}', False) for name in uses_snap_cache]):
+                column = bb.column()
+                column.prop(self, "snap_cache_budget")
+
 
         if any([getattr(bpy.types, f'MACHIN3_{name}', False) for name in has_hud]):
             bb = b.box()
@@ -1372,6 +1403,44 @@ class MACHIN3toolsPreferences(bpy.types.AddonPreferences):
                 col.prop(self, "tools_show_tool_bar")
 
 
+        # PROFILING
+
+        bb = b.box()
+        bb.prop(self, 'profile_show', text="Profiling", icon='TRIA_DOWN' if self.profile_show else 'TRIA_RIGHT', emboss=False)
+
+        if self.profile_show:
+            column = bb.column()
+            column.prop(self, "profile_handlers")
+
+            profiles = get_profiles()
+
+            if profiles:
+                column = bb.column(align=True)
+
+                row = column.split(factor=0.4, align=True)
+                row.label(text="Callback")
+
+                r = row.split(factor=0.2, align=True)
+                r.label(text="Calls")
+
+                for label in ['Total', 'p50', 'p99', 'Worst']:
+                    r.label(text=label)
+
+                for p in profiles:
+                    row = column.split(factor=0.4, align=True)
+                    row.label(text=p['name'])
+
+                    r = row.split(factor=0.2, align=True)
+                    r.label(text=str(p['count']))
+
+                    for key in ['total', 'p50', 'p99', 'worst']:
+                        r.label(text=f"{p[key] * 1000:.3f} ms")
+
+            row = bb.row(align=True)
+            row.operator('machin3.dump_profiles', text="Dump to JSON")
+            row.operator('machin3.reset_profiles', text="Reset")
+
+
         # NO SETTINGS
 
         if not any([getattr(bpy.types, f'MACHIN3_{name}', False) for name in has_settings]):
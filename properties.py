@@ -9,6 +9,7 @@ from . utils.registration import get_prefs, get_addon_prefs
 from . utils.tools import get_active_tool
 from . utils.light import adjust_lights_for_rendering, get_area_light_poll
 from . utils.view import sync_light_visibility
+from . utils.draw import axes_buffer
 from . items import eevee_preset_items, align_mode_items, render_engine_items, cycles_device_items, driver_limit_items, axis_items, driver_transform_items, driver_space_items, bc_orientation_items, shading_light_items
 
 
@@ -559,7 +560,16 @@ class M3ObjectProperties(bpy.types.PropertyGroup):
 
     # draw obj axes
 
-    draw_axes: BoolProperty(name="Draw Axes", default=False)
+    def update_draw_axes(self, context):
+        obj = self.id_data
+
+        if self.draw_axes:
+            axes_buffer.add(obj)
+
+        else:
+            axes_buffer.remove(obj)
+
+    draw_axes: BoolProperty(name="Draw Axes", default=False, update=update_draw_axes)
 
 
     # hidden
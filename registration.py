@@ -8,6 +8,8 @@ classes = {'CORE': [('properties', [('HistoryObjectsCollection', ''),
                     ('ui.operators.call_pie', [('CallMACHIN3toolsPie', 'call_machin3tools_pie')]),
                     ('ui.operators.draw', [('DrawLabel', 'draw_label'),
                                            ('DrawLabels', 'draw_labels')]),
+                    ('ui.operators.profile', [('DumpProfiles', 'dump_profiles'),
+                                              ('ResetProfiles', 'reset_profiles')]),
                     ('ui.panels', [('PanelMACHIN3tools', 'machin3_tools')]),
                     ('ui.menus', [('MenuMACHIN3toolsObjectContextMenu', 'machin3tools_object_context_menu'),
                                   ('MenuMACHIN3toolsMeshContextMenu', 'machin3tools_mesh_context_menu'),
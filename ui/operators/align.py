@@ -2,6 +2,7 @@ import bpy
 from bpy.props import EnumProperty, BoolProperty
 import bmesh
 from mathutils import Vector, Matrix, geometry
+import numpy as np
 from ... utils.math import get_center_between_verts, create_rotation_difference_matrix_from_quat, get_loc_matrix, create_selection_bbox, get_right_and_up_axes
 from ... items import axis_items, align_type_items, axis_mapping_dict, align_direction_items, align_space_items, align_mode_items
 from ... utils.selection import get_selected_vert_sequences, get_selection_islands
@@ -504,24 +505,50 @@ class Straighten(bpy.types.Operator):
 
     def straighten(self, bm, verts, v_start, v_end):
         # move all verts but the start and end verts on the vector described by the two
-        verts.remove(v_start)
-        verts.remove(v_end)
+        verts = [v for v in verts if v not in (v_start, v_end)]
 
-        for v in verts:
-            co, _ = geometry.intersect_point_line(v.co, v_start.co, v_end.co)
+        if not verts:
+            return
+
+        start = np.array(v_start.co)
+        direction = np.array(v_end.co) - start
+
+        coords = np.array([v.co for v in verts])
+
+        # project all verts on the line at once, like intersect_point_line() does for each individually
+        length_squared = direction @ direction
+        factors = (coords - start) @ direction / length_squared if length_squared else np.zeros(len(verts))
+
+        projected = start + factors[:, np.newaxis] * direction
+
+        for v, co in zip(verts, projected.tolist()):
             v.co = co
 
         bm.normal_update()
 
     def get_start_and_end_from_distance(self, verts):
-        # get vert pairs from selection, using a set of frozensets removes duplicate pairings like [v, v2] and [v2, v], etc
-        pairs = {frozenset([v, v2]) for v in verts for v2 in verts if v2 != v}
+        '''
+        instead of measuring the distance of every vert pair, only the extreme verts along the principal axis of the selection, as well as along the x, y and z axes are compared
+        for the roughly linear selections that are straightened, the principal axis extremes are the most distant verts
+        '''
+
+        coords = np.array([v.co for v in verts])
+        centered = coords - coords.mean(axis=0)
 
-        # get distances for each vert pair
-        distances = [((v2.co - v.co).length, (v, v2)) for v, v2 in pairs]
+        # the principal axis is the right singular vector of the largest singular value
+        _, _, vt = np.linalg.svd(centered, full_matrices=False)
+        axes = np.vstack((vt[0], np.identity(3)))
+
+        projections = centered @ axes.T
+        candidates = np.unique(np.concatenate((projections.argmin(axis=0), projections.argmax(axis=0))))
 
         # get the straight's start and end verts based on distance
-        return max(distances, key=lambda x: x[0])[1]
+        candidate_coords = coords[candidates]
+        distances = np.linalg.norm(candidate_coords[:, np.newaxis] - candidate_coords[np.newaxis], axis=2)
+
+        idx1, idx2 = np.unravel_index(np.argmax(distances), distances.shape)
+
+        return verts[candidates[idx1]], verts[candidates[idx2]]
 
     def get_start_and_end_from_history(self, bm):
         history = list(bm.select_history)
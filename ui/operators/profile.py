@@ -0,0 +1,45 @@
+import bpy
+from bpy.props import StringProperty
+import os
+from ... utils.developer import get_profiles, reset_profiles, dump_profiles
+
+
+class DumpProfiles(bpy.types.Operator):
+    bl_idname = "machin3.dump_profiles"
+    bl_label = "MACHIN3: Dump Profiles"
+    bl_description = "Write the recorded Handler and Draw Callback Timings to a JSON file"
+    bl_options = {'REGISTER'}
+
+    filepath: StringProperty(subtype='FILE_PATH')
+
+    @classmethod
+    def poll(cls, context):
+        return bool(get_profiles())
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = os.path.join(os.path.dirname(bpy.data.filepath) if bpy.data.filepath else bpy.app.tempdir, "MACHIN3tools_profiles.json")
+
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        dump_profiles(self.filepath)
+
+        self.report({'INFO'}, f"Saved Profiles to {self.filepath}")
+        return {'FINISHED'}
+
+
+class ResetProfiles(bpy.types.Operator):
+    bl_idname = "machin3.reset_profiles"
+    bl_label = "MACHIN3: Reset Profiles"
+    bl_description = "Clear the recorded Handler and Draw Callback Timings"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(get_profiles())
+
+    def execute(self, context):
+        reset_profiles()
+        return {'FINISHED'}
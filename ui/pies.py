@@ -8,6 +8,7 @@ from .. utils.collection import get_scene_collections
 from .. utils.system import abspath
 from .. utils.tools import get_tools_from_context, get_active_tool
 from .. utils.light import get_area_light_poll
+from .. utils.draw import axes_buffer
 
 
 # TODO: snapping pie
@@ -1018,7 +1019,7 @@ class PieShading(Menu):
             r.prop(view.shading, "xray_alpha", text="X-Ray")
 
         # object and cursor axes
-        hasaxes = m3.draw_cursor_axes or m3.draw_active_axes or any([obj.M3.draw_axes for obj in context.visible_objects])
+        hasaxes = m3.draw_cursor_axes or m3.draw_active_axes or any(axes_buffer.visible)
 
         row = column.split(factor=0.4, align=True)
         rs = row.split(factor=0.5, align=True)
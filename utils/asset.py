@@ -56,3 +56,26 @@ def update_asset_catalogs(self, context):
 
     default = get_prefs().preferred_default_catalog if get_prefs().preferred_default_catalog in self.catalogs else 'NONE'
     bpy.types.WindowManager.M3_asset_catalogs = bpy.props.EnumProperty(name="Asset Categories", items=items, default=default)
+
+
+def get_asset_stashes_and_backups(collection, meshmachine=False, decalmachine=False):
+    '''
+    collect MESHmachine's stash objects and DECALmachine's decal backups, referenced by the objects of an instance collection
+    when such an asset is dropped, these are linked to the scene too, so this is used instead of checking every object in the view layer
+    '''
+
+    objects = set()
+
+    for obj in collection.all_objects:
+        if meshmachine:
+            for stash in obj.MM.stashes:
+                if stash.obj and stash.obj.MM.isstashobj:
+                    objects.add(stash.obj)
+
+        if decalmachine:
+            backup = obj.DM.decalbackup
+
+            if backup and backup.DM.isbackup:
+                objects.add(backup)
+
+    return objects
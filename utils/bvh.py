@@ -0,0 +1,164 @@
+import bmesh
+from mathutils.bvhtree import BVHTree
+import numpy as np
+from collections import OrderedDict
+from . registration import get_prefs
+
+
+# GEOMETRY VERSIONS
+
+versions = {}
+
+
+def get_geometry_version(mesh):
+    return versions.get(mesh.session_uid, 0)
+
+
+def bump_geometry_version(mesh):
+    '''
+    called from the depsgraph dispatcher for every mesh, whose geometry changed
+    '''
+
+    versions[mesh.session_uid] = versions.get(mesh.session_uid, 0) + 1
+
+
+# MESH ARRAYS
+
+def get_triangle_arrays(mesh):
+    '''
+    return vertex coords, loop triangle vert indices and the polygon index of each loop triangle, all read via foreach_get
+    '''
+
+    mesh.calc_loop_triangles()
+
+    vert_count = len(mesh.vertices)
+    tri_count = len(mesh.loop_triangles)
+
+    coords = np.empty((vert_count, 3), dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords.ravel())
+
+    tris = np.empty((tri_count, 3), dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', tris.ravel())
+
+    tri_polygons = np.empty(tri_count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', tri_polygons)
+
+    return coords, tris, tri_polygons
+
+
+def get_bmesh_triangle_arrays(bm):
+    '''
+    like get_triangle_arrays(), but for a bmesh, like an edit mesh, which doesn't need to be written to its mesh first
+    '''
+
+    bm.verts.index_update()
+    bm.faces.index_update()
+
+    loop_triangles = bm.calc_loop_triangles()
+
+    coords = np.array([v.co for v in bm.verts], dtype=np.float32).reshape(-1, 3)
+    tris = np.array([[l.vert.index for l in tri] for tri in loop_triangles], dtype=np.int32).reshape(-1, 3)
+    tri_polygons = np.array([tri[0].face.index for tri in loop_triangles], dtype=np.int32)
+
+    return coords, tris, tri_polygons
+
+
+# BVH CACHE
+
+class BVHEntry:
+    '''
+    BVH of a single mesh, built directly from vertex and loop triangle arrays
+    the arrays are kept, as the BVH's indices are triangle indices, and have to be mapped back to polygon indices
+    '''
+
+    def __init__(self, mesh, version, bm=None):
+        self.version = version
+
+        self.coords, self.tris, self.tri_polygons = get_bmesh_triangle_arrays(bm) if bm else get_triangle_arrays(mesh)
+        self.bvh = BVHTree.FromPolygons(self.coords.tolist(), self.tris.tolist(), all_triangles=True)
+
+        # rough estimate, the BVH itself takes about as much as the arrays it's built from
+        self.size = 2 * (self.coords.nbytes + self.tris.nbytes) + self.tri_polygons.nbytes
+
+    def ray_cast(self, origin, direction, distance=1.84467e19):
+        '''
+        like BVHTree.ray_cast(), but returning the polygon index instead of the triangle index
+        '''
+
+        location, normal, index, distance = self.bvh.ray_cast(origin, direction, distance)
+
+        if index is not None:
+            index = int(self.tri_polygons[index])
+
+        return location, normal, index, distance
+
+    def find_nearest(self, origin, distance=1.84467e19):
+        location, normal, index, distance = self.bvh.find_nearest(origin, distance)
+
+        if index is not None:
+            index = int(self.tri_polygons[index])
+
+        return location, normal, index, distance
+
+
+class BVHCache:
+    '''
+    session wide cache of BVHs, keyed on the mesh datablock and its geometry version
+    entries are evicted least recently used first, once the memory budget set in the addon preferences is exceeded
+    '''
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, obj):
+        '''
+        fetch the BVH entry of an object's mesh, building it only if the mesh isn't cached yet or its geometry changed since
+        '''
+
+        mesh = obj.data
+        key = mesh.session_uid
+        version = get_geometry_version(mesh)
+
+        entry = self.entries.get(key)
+
+        if entry and entry.version == version:
+            self.entries.move_to_end(key)
+            return entry
+
+        if entry:
+            self.remove(key)
+
+        # edit mesh changes only make it to the mesh once it's updated from edit mode, so build from the edit mesh directly
+        # NOTE: update_from_editmode() would tag the geometry, and so bump the version on the next depsgraph update, invalidating the entry right away
+        entry = BVHEntry(mesh, version, bm=bmesh.from_edit_mesh(mesh) if obj.mode == 'EDIT' else None)
+
+        self.entries[key] = entry
+        self.size += entry.size
+
+        self.evict(keep=key)
+
+        return entry
+
+    def evict(self, keep=None):
+        budget = get_prefs().bvh_cache_budget * 1024 ** 2
+
+        for key in list(self.entries):
+            if self.size <= budget:
+                break
+
+            if key != keep:
+                self.remove(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+
+        if entry:
+            self.size -= entry.size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+bvh_cache = BVHCache()
@@ -2,6 +2,9 @@ import os
 import pkgutil
 import importlib
 import time
+import json
+from collections import deque
+from functools import wraps
 
 
 chronicle = []
@@ -47,6 +50,279 @@ class Benchmark():
             chronicle = self.chronicle
 
 
+# PROFILING
+
+profiling = False
+profiles = {}
+
+
+class Profile():
+    '''
+    timings of a single handler or draw callback
+    call count, cumulative and worst case time are kept for all calls, percentiles are based on the most recent calls in the ring buffer
+    '''
+
+    def __init__(self, name, size=1000):
+        self.name = name
+        self.count = 0
+        self.total = 0
+        self.worst = 0
+        self.recent = deque(maxlen=size)
+
+    def add(self, t):
+        self.count += 1
+        self.total += t
+        self.recent.append(t)
+
+        if t > self.worst:
+            self.worst = t
+
+    def percentile(self, p):
+        if not self.recent:
+            return 0
+
+        recent = sorted(self.recent)
+        return recent[min(int(len(recent) * p / 100), len(recent) - 1)]
+
+    def as_dict(self):
+        return {'name': self.name,
+                'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else 0,
+                'p50': self.percentile(50),
+                'p99': self.percentile(99),
+                'worst': self.worst}
+
+
+def profile(func):
+    '''
+    decorator timing each call of a handler or draw callback, while profiling is enabled
+    when it's disabled, the only overhead is the check of the profiling flag
+    '''
+
+    name = f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiling:
+            return func(*args, **kwargs)
+
+        start = time.perf_counter()
+
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            t = time.perf_counter() - start
+
+            if name not in profiles:
+                profiles[name] = Profile(name)
+
+            profiles[name].add(t)
+
+    return wrapper
+
+
+def set_profiling(state):
+    global profiling
+    profiling = state
+
+
+def get_profiles():
+    '''
+    return the profiles as dicts, with the most expensive callbacks first
+    '''
+
+    return sorted([p.as_dict() for p in profiles.values()], key=lambda x: x['total'], reverse=True)
+
+
+def reset_profiles():
+    profiles.clear()
+
+
+def dump_profiles(path):
+    with open(path, 'w') as f:
+        json.dump(get_profiles(), f, indent=4)
+
+
+# BENCHMARKS
+
+def create_benchmark_scene(count, spacing=3):
+    '''
+    create a temporary scene with a grid of cubes, all sharing a single mesh
+    '''
+
+    import bpy
+    import bmesh
+
+    mesh = bpy.data.meshes.new("M3_benchmark")
+
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=1)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    scene = bpy.data.scenes.new("M3_benchmark")
+    side = round(count ** (1 / 3)) + 1
+
+    objects = []
+
+    for idx in range(count):
+        obj = bpy.data.objects.new(f"M3_benchmark_{idx}", mesh)
+        obj.location = (idx % side * spacing, idx // side % side * spacing, idx // side ** 2 * spacing)
+        scene.collection.objects.link(obj)
+
+        objects.append(obj)
+
+    depsgraph = scene.view_layers[0].depsgraph
+    depsgraph.update()
+
+    return scene, objects, depsgraph, side * spacing
+
+
+def remove_benchmark_scene(scene, objects):
+    import bpy
+
+    mesh = objects[0].data
+
+    for obj in objects:
+        bpy.data.objects.remove(obj, do_unlink=True)
+
+    bpy.data.scenes.remove(scene)
+    bpy.data.meshes.remove(mesh)
+
+
+def benchmark_get_closest(counts=(100, 1000, 10000), queries=50):
+    '''
+    compare the query latency of get_closest() with its bounding box broadphase, against checking every object
+    run it from Blender's Python console: from MACHIN3tools.utils.developer import benchmark_get_closest
+    '''
+
+    from random import seed, uniform
+    from mathutils import Vector
+    from . raycast import get_closest, box_index
+
+    seed(0)
+
+    for count in counts:
+        scene, objects, depsgraph, size = create_benchmark_scene(count)
+        points = [Vector((uniform(0, size), uniform(0, size), uniform(0, size))) for _ in range(queries)]
+
+
+        # LINEAR
+
+        start = time.perf_counter()
+
+        for point in points:
+            for obj in objects:
+                obj.evaluated_get(depsgraph)
+                obj.closest_point_on_mesh(obj.matrix_world.inverted_safe() @ point, depsgraph=depsgraph)
+
+        linear = (time.perf_counter() - start) / queries
+
+
+        # INDEXED
+
+        box_index.clear()
+
+        start = time.perf_counter()
+        get_closest(points[0], candidates=objects, depsgraph=depsgraph)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+
+        for point in points:
+            get_closest(point, candidates=objects, depsgraph=depsgraph)
+
+        indexed = (time.perf_counter() - start) / queries
+
+        print(f"{count:>6} objects - linear: {linear * 1000:.3f} ms, indexed: {indexed * 1000:.3f} ms per query, first query incl. index build: {build * 1000:.3f} ms")
+
+        box_index.clear()
+        remove_benchmark_scene(scene, objects)
+
+
+def benchmark_mesh_ops(sizes=(10, 100, 1000), repeats=3):
+    '''
+    compare the array based blast(), smooth() and flip_normals() against their bmesh counterparts, on grids of size x size faces
+    run it from Blender's Python console: from MACHIN3tools.utils.developer import benchmark_mesh_ops
+    '''
+
+    import bpy
+    import bmesh
+    from . mesh import blast, smooth, flip_normals, blast_bmesh, smooth_bmesh, flip_normals_bmesh
+
+    def create_grid(size):
+        mesh = bpy.data.meshes.new("M3_benchmark")
+
+        bm = bmesh.new()
+        bmesh.ops.create_grid(bm, x_segments=size, y_segments=size, size=1)
+
+        # hide every other face, so there's something to blast
+        for idx, f in enumerate(bm.faces):
+            f.hide = idx % 2 == 0
+
+        bm.to_mesh(mesh)
+        bm.free()
+
+        return mesh
+
+    def run(func, size):
+        times = []
+
+        for _ in range(repeats):
+            mesh = create_grid(size)
+
+            start = time.perf_counter()
+            func(mesh)
+            times.append(time.perf_counter() - start)
+
+            bpy.data.meshes.remove(mesh)
+
+        return min(times) * 1000
+
+    ops = [('blast', lambda mesh: blast(mesh, 'hidden', 'FACES'), lambda mesh: blast_bmesh(mesh, 'hidden', 'FACES')),
+           ('smooth', smooth, smooth_bmesh),
+           ('flip', flip_normals, flip_normals_bmesh)]
+
+    for size in sizes:
+        for name, array_func, bmesh_func in ops:
+            print(f"{size * size:>8} faces - {name:>6} - bmesh: {run(bmesh_func, size):.3f} ms, arrays: {run(array_func, size):.3f} ms")
+
+
+def benchmark_vert_sequences(sizes=(1000, 10000, 100000)):
+    '''
+    time get_selected_vert_sequences() and get_edges_vert_sequences() on selected circles of increasing vert counts
+    with linear scaling the time per vert stays about the same for all sizes
+    run it from Blender's Python console: from MACHIN3tools.utils.developer import benchmark_vert_sequences
+    '''
+
+    import bmesh
+    from . selection import get_selected_vert_sequences, get_edges_vert_sequences
+
+    for size in sizes:
+        bm = bmesh.new()
+        bmesh.ops.create_circle(bm, cap_ends=False, segments=size, radius=1)
+
+        for e in bm.edges:
+            e.select = True
+
+        verts = list(bm.verts)
+        edges = list(bm.edges)
+
+        start = time.perf_counter()
+        get_selected_vert_sequences(verts.copy())
+        selected = time.perf_counter() - start
+
+        start = time.perf_counter()
+        get_edges_vert_sequences(verts.copy(), edges)
+        edged = time.perf_counter() - start
+
+        print(f"{size:>7} verts - selected: {selected * 1000:.3f} ms ({selected / size * 1000000:.3f} us per vert), edges: {edged * 1000:.3f} ms ({edged / size * 1000000:.3f} us per vert)")
+
+        bm.free()
+
+
 def output_traceback(self):
     import traceback
     print()
@@ -1,19 +1,165 @@
 import bpy
 from mathutils import Vector, Matrix
+import numpy as np
 import gpu
 from gpu_extras.batch import batch_for_shader
 from gpu_extras.presets import draw_circle_2d
 import blf
 from . wm import get_last_operators
 from . registration import get_prefs, get_addon
-from . ui import require_header_offset, get_zoom_factor
+from . ui import require_header_offset, get_zoom_factor, get_zoom_factors
 from . tools import get_active_tool
+from . developer import profile
 from .. colors import red, green, blue, black, white
 
 
 hypercursor = None
 
-def draw_axes_HUD(context, objects):
+
+# AXES
+
+class AxesBuffer:
+    '''
+    world space origins and normalized axes of all objects with M3.draw_axes enabled, shared by draw_axes_HUD()
+    it's built once per scene, and from then on kept current by property updates, depsgraph deltas and frame changes
+    rows are only recomputed for objects, whose matrix_world changed
+    '''
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.scene = None
+
+        self.objects = []
+        self.rows = {}
+
+        self.origins = np.empty((0, 3), dtype=np.float32)
+        self.axes = np.empty((0, 3, 3), dtype=np.float32)
+        self.visible = np.empty(0, dtype=bool)
+
+    def build(self, scene):
+        self.clear()
+        self.scene = scene.name
+
+        self._set_objects([obj for obj in scene.objects if obj.M3.draw_axes])
+
+    def add(self, obj):
+        '''
+        append a single row, rather than rebuilding the buffer
+        '''
+
+        if obj in self.rows:
+            return
+
+        # skip invalid objects, and objects no longer in the view layer
+        try:
+            visible = obj.visible_get()
+
+        except (ReferenceError, RuntimeError):
+            return
+
+        origin, axes = get_axes_from_matrix(obj.matrix_world)
+
+        self.rows[obj] = len(self.objects)
+        self.objects.append(obj)
+
+        self.origins = np.concatenate((self.origins, origin[np.newaxis]))
+        self.axes = np.concatenate((self.axes, axes[np.newaxis]))
+        self.visible = np.append(self.visible, visible)
+
+    def remove(self, obj):
+        '''
+        remove a single row, by moving the last row into its place, so no other rows have to be renumbered
+        '''
+
+        row = self.rows.pop(obj, None)
+
+        if row is None:
+            return
+
+        last = len(self.objects) - 1
+
+        if row != last:
+            moved = self.objects[last]
+
+            self.objects[row] = moved
+            self.rows[moved] = row
+
+            self.origins[row] = self.origins[last]
+            self.axes[row] = self.axes[last]
+            self.visible[row] = self.visible[last]
+
+        self.objects.pop()
+
+        self.origins = self.origins[:last]
+        self.axes = self.axes[:last]
+        self.visible = self.visible[:last]
+
+    def update_matrices(self, objects):
+        for obj in objects:
+            row = self.rows.get(obj)
+
+            if row is not None:
+                self.origins[row], self.axes[row] = get_axes_from_matrix(obj.matrix_world)
+
+    def update_visibility(self):
+        '''
+        removed objects are dropped here as well
+        '''
+
+        invalid = []
+
+        for obj, row in self.rows.items():
+            try:
+                self.visible[row] = obj.visible_get()
+
+            except (ReferenceError, RuntimeError):
+                invalid.append(obj)
+
+        for obj in invalid:
+            self.remove(obj)
+
+    def _set_objects(self, objects):
+        self.objects = []
+
+        # remove invalid objects, and objects no longer in the view layer
+        for obj in objects:
+            try:
+                obj.visible_get()
+                self.objects.append(obj)
+
+            except (ReferenceError, RuntimeError):
+                pass
+
+        self.rows = {obj: idx for idx, obj in enumerate(self.objects)}
+
+        self.origins = np.empty((len(self.objects), 3), dtype=np.float32)
+        self.axes = np.empty((len(self.objects), 3, 3), dtype=np.float32)
+        self.visible = np.array([obj.visible_get() for obj in self.objects], dtype=bool)
+
+        self.update_matrices(self.objects)
+
+
+axes_buffer = AxesBuffer()
+
+
+def get_axes_from_matrix(mx):
+    '''
+    return the origin and the 3 normalized axes of the passed in matrix
+    '''
+
+    mx = np.array(mx, dtype=np.float32)
+
+    axes = mx[:3, :3].T
+    lengths = np.linalg.norm(axes, axis=1)
+    lengths[lengths == 0] = 1
+
+    return mx[:3, 3], axes / lengths[:, np.newaxis]
+
+
+@profile
+def draw_axes_HUD(context):
     global hypercursor
     
     if not hypercursor:
@@ -31,68 +177,59 @@ def draw_axes_HUD(context, objects):
         show_cursor = context.space_data.overlay.show_cursor
         show_hyper_cursor = hypercursor and get_active_tool(context).idname in ['machin3.tool_hyper_cursor', 'machin3.tool_hyper_cursor_simple'] and context.scene.HC.show_gizmos
 
-        axes = [(Vector((1, 0, 0)), red), (Vector((0, 1, 0)), green), (Vector((0, 0, 1)), blue)]
-
-        for axis, color in axes:
-            coords = []
 
-            # draw object(s)
-            for obj in objects:
+        # OBJECTS
 
-                # CURSOR
+        origins = axes_buffer.origins[axes_buffer.visible]
+        obj_axes = axes_buffer.axes[axes_buffer.visible]
 
-                if obj == 'CURSOR':
+        active = context.active_object
 
-                    # only show the cursor axes when the hyper cursor gizmo isn't shown
-                    if not show_hyper_cursor:
-                        mx = context.scene.cursor.matrix
-                        origin = mx.decompose()[0]
+        if m3.draw_active_axes and active and active not in axes_buffer.rows:
+            origin, active_axes = get_axes_from_matrix(active.matrix_world)
 
-                        factor = get_zoom_factor(context, origin, scale=300, ignore_obj_scale=True) if screenspace else 1
+            origins = np.vstack((origins, origin[np.newaxis]))
+            obj_axes = np.vstack((obj_axes, active_axes[np.newaxis]))
 
-                        if show_cursor and screenspace:
-                            coords.append(origin + (mx.to_3x3() @ axis).normalized() * 0.1 * ui_scale * factor * 0.8)
-                            coords.append(origin + (mx.to_3x3() @ axis).normalized() * 0.1 * ui_scale * factor * 1.2)
+        if len(origins):
+            factors = get_zoom_factors(context, origins, scale=300) if screenspace else np.ones(len(origins), dtype=np.float32)
+            lengths = (size * ui_scale * factors)[:, np.newaxis]
 
-                        else:
-                            coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.9)
-                            coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor)
+        axes = [(Vector((1, 0, 0)), red), (Vector((0, 1, 0)), green), (Vector((0, 0, 1)), blue)]
 
-                            coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.1)
-                            coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.7)
+        for idx, (axis, color) in enumerate(axes):
+            coords = np.empty((len(origins) * 2, 3), dtype=np.float32)
 
-                # OBJECT
+            if len(origins):
+                coords[0::2] = origins + obj_axes[:, idx] * lengths * 0.1
+                coords[1::2] = origins + obj_axes[:, idx] * lengths
 
-                elif str(obj) != '<bpy_struct, Object invalid>':
-                    mx = obj.matrix_world
-                    origin = mx.decompose()[0]
 
-                    factor = get_zoom_factor(context, origin, scale=300, ignore_obj_scale=True) if screenspace else 1
+            # CURSOR
 
-                    coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.1)
-                    coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor)
+            # only show the cursor axes when the hyper cursor gizmo isn't shown
+            if m3.draw_cursor_axes and not show_hyper_cursor:
+                cursor_coords = []
 
-                    """
-                    # debuging stash + stashtargtmx for object origin changes
-                    for stash in obj.MM.stashes:
-                        if s tash.obj:
-                            smx = sta sh.obj.MM.stashmx
-                            sorigin = smx.decompose()[0]
+                mx = context.scene.cursor.matrix
+                origin = mx.decompose()[0]
 
-                            coords.append(sorigin + smx.to_3x3() @ axis * size * 0.1)
-                            coords.append(sorigin + smx.to_3x3() @ axis * size)
+                factor = get_zoom_factor(context, origin, scale=300, ignore_obj_scale=True) if screenspace else 1
 
+                if show_cursor and screenspace:
+                    cursor_coords.append(origin + (mx.to_3x3() @ axis).normalized() * 0.1 * ui_scale * factor * 0.8)
+                    cursor_coords.append(origin + (mx.to_3x3() @ axis).normalized() * 0.1 * ui_scale * factor * 1.2)
 
-                            stmx = stash.obj.MM.stashtargetmx
-                            storigin = stmx.decompose()[0]
+                else:
+                    cursor_coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.9)
+                    cursor_coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor)
 
-                            coords.append(storigin + stmx.to_3x3() @ axis * size * 0.1)
-                            coords.append(storigin + stmx.to_3x3() @ axis * size)
-                    """
+                    cursor_coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.1)
+                    cursor_coords.append(origin + (mx.to_3x3() @ axis).normalized() * size * ui_scale * factor * 0.7)
 
-            if coords:
-                indices = [(i, i + 1) for i in range(0, len(coords), 2)]
+                coords = np.vstack((coords, np.array(cursor_coords, dtype=np.float32)))
 
+            if len(coords):
                 shader = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
                 shader.bind()
                 shader.uniform_float("color", (*color, alpha))
@@ -103,10 +240,11 @@ def draw_axes_HUD(context, objects):
 
                 use_legacy_line_smoothing(alpha, 2)
 
-                batch = batch_for_shader(shader, 'LINES', {"pos": coords}, indices=indices)
+                batch = batch_for_shader(shader, 'LINES', {"pos": coords})
                 batch.draw(shader)
 
 
+@profile
 def draw_focus_HUD(context, color=(1, 1, 1), alpha=1, width=2):
     if context.space_data.overlay.show_overlays:
         region = context.region
@@ -155,6 +293,7 @@ def draw_focus_HUD(context, color=(1, 1, 1), alpha=1, width=2):
             blf.draw(font, title)
 
 
+@profile
 def draw_surface_slide_HUD(context, color=(1, 1, 1), alpha=1, width=2):
     if context.space_data.overlay.show_overlays:
         region = context.region
@@ -177,6 +316,7 @@ def draw_surface_slide_HUD(context, color=(1, 1, 1), alpha=1, width=2):
         blf.draw(font, title)
 
 
+@profile
 def draw_screen_cast_HUD(context):
     p = get_prefs()
     operators = get_last_operators(context, debug=False)[-p.screencast_operator_count:]
@@ -1,4 +1,9 @@
 import sys
+import heapq
+from math import dist
+from collections import OrderedDict
+import numpy as np
+from . bvh import get_geometry_version
 
 
 def build_mesh_graph(verts, edges, topo=True):
@@ -15,79 +20,165 @@ def build_mesh_graph(verts, edges, topo=True):
     return mg
 
 
-def get_shortest_path(bm, vstart, vend, topo=False, select=False):
-    """
-    author: "G Bantle, Bagration, MACHIN3",
-    source: "https://blenderartists.org/forum/showthread.php?58564-Path-Select-script(Update-20060307-Ported-to-C-now-in-CVS",
-    video: https://www.youtube.com/watch?v=_lHSawdgXpI
-    """
+# CSR GRAPH
 
-    def dijkstra(mg, vstart, vend, topo=True):
-        # initiate dict to collect distances from stat vert to every other vert
-        d = dict.fromkeys(mg.keys(), sys.maxsize)
+graph_cache = OrderedDict()
+graph_cache_size = 8
 
-        # predecessor dict to track the path walked
-        predecessor = dict.fromkeys(mg.keys())
 
-        # the distance of the start vert to itself is 0
-        d[vstart] = 0
+class MeshGraph:
+    '''
+    vert adjacency of a bmesh in compressed sparse row form, built from its edge array
+    the neighbours of vert i are indices[indptr[i]:indptr[i + 1]], and the lengths of the edges leading to them are lengths[indptr[i]:indptr[i + 1]]
+    '''
 
-        # keep track of what verts are seen and add the the accumulated distances to those verts
-        unknownverts = [(0, vstart)]
+    def __init__(self, bm, version=None):
+        self.version = version
 
-        # with topo you can exit as soon as you hit the vend, without topo you can't, because the shorter distance my involve more vert hops
-        # while (topo and vstart != vend) or (not topo and unknownverts):
-        while unknownverts:
-            # sorting actually doesn't seem to  be required, but it was in the original source
-            # I question why the list needs to be sorted by index at all. also, doing it via the lambda function is very slow for some reason
-            # unknownverts.sort(key=lambda x: x[1].index)
+        bm.verts.index_update()
 
-            # get the next vert that is closest to vstart
-            dist, vcurrent = unknownverts[0]
+        self.vert_count = len(bm.verts)
+        self.edge_count = len(bm.edges)
 
-            # use the mesh graph to retrieve the other verts connected
-            others = mg[vcurrent]
+        coords = np.array([v.co for v in bm.verts], dtype=np.float64).reshape(-1, 3)
+        edges = np.array([(e.verts[0].index, e.verts[1].index) for e in bm.edges], dtype=np.int32).reshape(-1, 2)
 
-            # choose the next vert with the shortest accumulated distance
-            for vother, distance in others:
-                if d[vother] > d[vcurrent] + distance:
-                    d[vother] = d[vcurrent] + distance
+        sources = np.concatenate((edges[:, 0], edges[:, 1]))
+        targets = np.concatenate((edges[:, 1], edges[:, 0]))
+        lengths = np.linalg.norm(coords[targets] - coords[sources], axis=1)
 
-                    unknownverts.append((d[vother], vother))
-                    predecessor[vother] = vcurrent
+        order = np.argsort(sources, kind='stable')
+
+        indptr = np.zeros(self.vert_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self.vert_count), out=indptr[1:])
+
+        # the searches run in pure python, where plain lists are faster to index than arrays
+        self.indptr = indptr.tolist()
+        self.indices = targets[order].tolist()
+        self.lengths = lengths[order].tolist()
+        self.coords = coords.tolist()
+
+    def search(self, start, end, topo=False, astar=True):
+        '''
+        heap based Dijkstra from the start to the end vert index, using either hop counts or edge lengths
+        for geometric paths, it runs as A* by default, with the straight distance to the end vert as the heuristic
+        returns the list of vert indices along the path, or just the end index, if it can't be reached
+        '''
+
+        predecessor = self._search(start, {end}, topo=topo, heuristic_end=end if astar and not topo else None)
+
+        return self._backtrace(predecessor, end)
+
+    def search_many(self, start, ends, topo=False):
+        '''
+        a single Dijkstra from the start vert index, that only stops once all end vert indices are settled
+        returns a dict of end index: path
+        '''
+
+        predecessor = self._search(start, set(ends), topo=topo)
+
+        return {end: self._backtrace(predecessor, end) for end in ends}
+
+    def _search(self, start, ends, topo=False, heuristic_end=None):
+        indptr, indices, lengths, coords = self.indptr, self.indices, self.lengths, self.coords
 
-            # we've finished exploring this vert, pop it
-            unknownverts.pop(0)
+        end_co = coords[heuristic_end] if heuristic_end is not None else None
 
-            # you can break out early when determening the topological distances
-            if topo and vcurrent == vend:
+        distances = {start: 0}
+        predecessor = {start: None}
+        done = set()
+
+        remaining = set(ends)
+        heap = [(0, 0, start)]
+
+        while heap:
+            _, d, vcurrent = heapq.heappop(heap)
+
+            if vcurrent in done:
+                continue
+
+            done.add(vcurrent)
+            remaining.discard(vcurrent)
+
+            if not remaining:
                 break
 
-        # backtrace from the end vertex using the predecessor dict
+            for idx in range(indptr[vcurrent], indptr[vcurrent + 1]):
+                vother = indices[idx]
+                d_other = d + (1 if topo else lengths[idx])
+
+                if d_other < distances.get(vother, sys.maxsize):
+                    distances[vother] = d_other
+                    predecessor[vother] = vcurrent
+
+                    priority = d_other if end_co is None else d_other + dist(coords[vother], end_co)
+                    heapq.heappush(heap, (priority, d_other, vother))
+
+        return predecessor
+
+    def _backtrace(self, predecessor, end):
         path = []
-        endvert = vend
+        vcurrent = end
 
-        while endvert is not None:
-            path.append(endvert)
-            endvert = predecessor[endvert]
+        while vcurrent is not None:
+            path.append(vcurrent)
+            vcurrent = predecessor.get(vcurrent)
 
-        return reversed(path)
+        path.reverse()
+        return path
 
-    def f7(seq):
-        seen = set()
-        seen_add = seen.add
-        return [x for x in seq if not (x in seen or seen_add(x))]
 
-    verts = [v for v in bm.verts]
-    edges = [e for e in bm.edges]
+def get_mesh_graph(bm, mesh=None):
+    '''
+    get the MeshGraph of a bmesh, cached per mesh datablock and its geometry version, if the mesh is passed in
+    '''
 
-    mg = build_mesh_graph(verts, edges, topo)
+    if mesh is None:
+        return MeshGraph(bm)
 
-    # vert list, shortest dist from vstart to vend
-    path = dijkstra(mg, vstart, vend, topo)
+    key = mesh.session_uid
+    version = get_geometry_version(mesh)
+
+    graph = graph_cache.get(key)
+
+    # the element counts guard against changes made to the bmesh, that weren't yet picked up by the depsgraph
+    if graph and graph.version == version and graph.vert_count == len(bm.verts) and graph.edge_count == len(bm.edges):
+        graph_cache.move_to_end(key)
+        bm.verts.index_update()
+        return graph
+
+    graph = MeshGraph(bm, version=version)
+    graph_cache[key] = graph
 
-    # remove duplicates, keeps order, see https://stackoverflow.com/a/480227
-    path = f7(path)
+    while len(graph_cache) > graph_cache_size:
+        graph_cache.popitem(last=False)
+
+    return graph
+
+
+def clear_mesh_graphs():
+    '''
+    clear the graph cache, run after undo and redo, which can restore older geometry under the same mesh and geometry version
+    '''
+
+    graph_cache.clear()
+
+
+def get_shortest_path(bm, vstart, vend, topo=False, select=False, mesh=None, astar=True):
+    """
+    author: "G Bantle, Bagration, MACHIN3",
+    source: "https://blenderartists.org/forum/showthread.php?58564-Path-Select-script(Update-20060307-Ported-to-C-now-in-CVS",
+    video: https://www.youtube.com/watch?v=_lHSawdgXpI
+
+    pass in the mesh of an edit mode bmesh, to re-use its graph for repeated queries, see get_mesh_graph()
+    """
+
+    graph = get_mesh_graph(bm, mesh=mesh)
+
+    bm.verts.ensure_lookup_table()
+
+    # vert list, shortest dist from vstart to vend
+    path = [bm.verts[idx] for idx in graph.search(vstart.index, vend.index, topo=topo, astar=astar)]
 
     # optionally select the path
     if select:
@@ -95,3 +186,40 @@ def get_shortest_path(bm, vstart, vend, topo=False, select=False):
             v.select = True
 
     return path
+
+
+def get_shortest_paths(bm, pairs, topo=False, select=False, mesh=None, astar=True):
+    '''
+    shortest paths for many (vstart, vend) pairs, all sharing a single graph
+    pairs with the same start vert share a single search, that runs until all their ends are reached, all other pairs are searched individually
+    returns the paths in the order of the passed in pairs
+    '''
+
+    graph = get_mesh_graph(bm, mesh=mesh)
+
+    bm.verts.ensure_lookup_table()
+
+    ends_by_start = {}
+
+    for vstart, vend in pairs:
+        ends_by_start.setdefault(vstart.index, []).append(vend.index)
+
+    paths_by_pair = {}
+
+    for start, ends in ends_by_start.items():
+        if len(set(ends)) == 1:
+            paths_by_pair[(start, ends[0])] = graph.search(start, ends[0], topo=topo, astar=astar)
+
+        else:
+            for end, path in graph.search_many(start, ends, topo=topo).items():
+                paths_by_pair[(start, end)] = path
+
+    paths = [[bm.verts[idx] for idx in paths_by_pair[(vstart.index, vend.index)]] for vstart, vend in pairs]
+
+    # optionally select the paths
+    if select:
+        for path in paths:
+            for v in path:
+                v.select = True
+
+    return paths
@@ -148,6 +148,57 @@ def get_group_matrix(context, objects, location_type='AVERAGE', rotation_type='W
     return get_loc_matrix(location) @ get_rot_matrix(rotation)
 
 
+# INDEX
+
+group_empties = {}
+
+
+def update_group_empties(scene, view_layer, objects=None, selection=None):
+    '''
+    keep a per-scene index of group empties and their last known selection state
+    the index is built once from the view layer's objects, and from then on only the passed in objects are checked
+    these are the objects changed in the last depsgraph update, and the ones whose selection changed
+    return the group empties, whose selection state flipped, this includes newly found ones
+    '''
+
+    key = (scene.name, view_layer.name)
+
+    if key not in group_empties:
+        group_empties[key] = {obj: obj.select_get(view_layer=view_layer) for obj in view_layer.objects if obj.M3.is_group_empty}
+        return list(group_empties[key])
+
+    index = group_empties[key]
+    flipped = []
+
+    for obj in (objects or set()) | (selection or set()):
+        try:
+            if obj.M3.is_group_empty:
+                state = obj.select_get(view_layer=view_layer)
+
+                if index.get(obj) != state:
+                    index[obj] = state
+                    flipped.append(obj)
+
+            elif obj in index:
+                del index[obj]
+
+        # removed objects or objects no longer in the view layer
+        except (ReferenceError, RuntimeError):
+            index.pop(obj, None)
+
+    return flipped
+
+
+def invalidate_group_empties():
+    '''
+    clear the group empty index, it will be rebuilt on the next depsgraph update
+    this is called via msgbus when is_group_empty is changed in the UI, but msgbus doesn't fire for changes done in Python
+    so code setting is_group_empty on existing objects has to call it itself, new objects are picked up by the next depsgraph update anyway
+    '''
+
+    group_empties.clear()
+
+
 # HIERARCHY
 
 def select_group_children(view_layer, empty, recursive=False):
@@ -2,114 +2,249 @@ import bpy
 import bmesh
 from mathutils import Vector, Matrix
 import numpy as np
+from collections import OrderedDict
+from . bvh import get_geometry_version
 
 
-def get_coords(mesh, mx=None, offset=0, indices=False):
+# COORDS
+
+coords_cache = OrderedDict()
+coords_cache_size = 64
+
+
+def get_coords(mesh, mx=None, offset=0, indices=False, cache=False):
+    '''
+    get the mesh's vert coords as a float32 array, optionally offset along the vert normals and transformed by mx, as well as the edge vert indices
+    with cache=True, the results are kept keyed on the mesh, its geometry version, the offset and the matrix, so unchanged meshes aren't read again
+    cached arrays are shared, so treat them as read only
+    '''
+
+    if cache:
+        key = (mesh.session_uid, get_geometry_version(mesh), offset, tuple(map(tuple, mx)) if mx else None, indices)
+
+        result = coords_cache.get(key)
+
+        # the element counts guard against changes, that weren't yet picked up by the depsgraph
+        if result is not None:
+            coords, edge_indices = result if indices else (result, None)
+
+            if len(coords) == len(mesh.vertices) and (edge_indices is None or len(edge_indices) == len(mesh.edges)):
+                coords_cache.move_to_end(key)
+                return result
+
     verts = mesh.vertices
     vert_count = len(verts)
 
-    coords = np.empty((vert_count, 3), np.float)
-    mesh.vertices.foreach_get('co', np.reshape(coords, vert_count * 3))
+    coords = np.empty((vert_count, 3), dtype=np.float32)
+    verts.foreach_get('co', coords.ravel())
 
     # offset along vertex normal
     if offset:
-        normals = np.empty((vert_count, 3), np.float)
-        mesh.vertices.foreach_get('normal', np.reshape(normals, vert_count * 3))
+        normals = np.empty((vert_count, 3), dtype=np.float32)
+        verts.foreach_get('normal', normals.ravel())
 
-        coords = coords + normals * offset
+        coords += normals * offset
 
-    # bring coords into non-local space
+    # bring coords into non-local space, by applying the 3x3 and the translation directly, no homogeneous coords needed
     if mx:
-        coords_4d = np.ones((vert_count, 4), dtype=np.float)
-        coords_4d[:, :-1] = coords
-
-        coords = np.einsum('ij,aj->ai', mx, coords_4d)[:, :-1]
-
-    # float64 seems faster to calculate than 32, + the einsum turns it into 64 anyway
-    # but float32 is needed for gpu drawing, so convert
-    coords = np.float32(coords)
+        mx = np.array(mx, dtype=np.float32)
+        coords = coords @ mx[:3, :3].T + mx[:3, 3]
 
     if indices:
         edges = mesh.edges
         edge_count = len(edges)
 
-        indices = np.empty((edge_count, 2), 'i')
-        edges.foreach_get('vertices', np.reshape(indices, edge_count * 2))
+        edge_indices = np.empty((edge_count, 2), dtype=np.int32)
+        edges.foreach_get('vertices', edge_indices.ravel())
+
+        result = coords, edge_indices
 
-        return coords, indices
+    else:
+        result = coords
 
+    if cache:
+        coords_cache[key] = result
 
-    return coords
+        while len(coords_cache) > coords_cache_size:
+            coords_cache.popitem(last=False)
+
+    return result
+
+
+def clear_coords_cache():
+    '''
+    clear the coords cache, run after undo and redo, which can restore older geometry under the same mesh and geometry version
+    '''
+
+    coords_cache.clear()
 
 
 # MESH
 
-def hide(mesh):
-    mesh.polygons.foreach_set('hide', [True] * len(mesh.polygons))
-    mesh.edges.foreach_set('hide', [True] * len(mesh.edges))
-    mesh.vertices.foreach_set('hide', [True] * len(mesh.vertices))
+# hide and select states are stored as generic bool attributes since Blender 3.4
+state_attributes = {'hide': [('.hide_poly', 'FACE', 'polygons'), ('.hide_edge', 'EDGE', 'edges'), ('.hide_vert', 'POINT', 'vertices')],
+                    'select': [('.select_poly', 'FACE', 'polygons'), ('.select_edge', 'EDGE', 'edges'), ('.select_vert', 'POINT', 'vertices')]}
 
-    mesh.update()
 
+def set_mesh_states(meshes, hide=None, select=None):
+    '''
+    set the hide and/or select states of all faces, edges and verts of many meshes at once
+    a single bool buffer sized to the largest mesh is allocated and reused for all of them, and the meshes are only updated in one pass at the end
+    on Blender 3.4+ the states are written via the attribute API, where unhiding or deselecting everything just removes the attribute
+    '''
 
-def unhide(mesh):
-    mesh.polygons.foreach_set('hide', [False] * len(mesh.polygons))
-    mesh.edges.foreach_set('hide', [False] * len(mesh.edges))
-    mesh.vertices.foreach_set('hide', [False] * len(mesh.vertices))
+    meshes = list(meshes)
 
-    mesh.update()
+    if not meshes:
+        return
 
+    use_attributes = bpy.app.version >= (3, 4, 0)
 
-def unhide_select(mesh):
-    polygons = len(mesh.polygons)
-    edges = len(mesh.edges)
-    vertices = len(mesh.vertices)
+    size = max(max(len(mesh.polygons), len(mesh.edges), len(mesh.vertices)) for mesh in meshes)
+    buffer = np.empty(size, dtype=bool)
 
-    mesh.polygons.foreach_set('hide', [False] * polygons)
-    mesh.edges.foreach_set('hide', [False] * edges)
-    mesh.vertices.foreach_set('hide', [False] * vertices)
+    for prop, value in [('hide', hide), ('select', select)]:
+        if value is None:
+            continue
 
-    mesh.polygons.foreach_set('select', [True] * polygons)
-    mesh.edges.foreach_set('select', [True] * edges)
-    mesh.vertices.foreach_set('select', [True] * vertices)
+        buffer.fill(value)
 
-    mesh.update()
+        for mesh in meshes:
+            for name, domain, collection in state_attributes[prop]:
+                elements = getattr(mesh, collection)
 
+                if use_attributes:
+                    attr = mesh.attributes.get(name)
 
-def unhide_deselect(mesh):
-    polygons = len(mesh.polygons)
-    edges = len(mesh.edges)
-    vertices = len(mesh.vertices)
+                    if not value:
+                        if attr:
+                            mesh.attributes.remove(attr)
+                        continue
 
-    mesh.polygons.foreach_set('hide', [False] * polygons)
-    mesh.edges.foreach_set('hide', [False] * edges)
-    mesh.vertices.foreach_set('hide', [False] * vertices)
+                    if not attr:
+                        attr = mesh.attributes.new(name, 'BOOLEAN', domain)
 
-    mesh.polygons.foreach_set('select', [False] * polygons)
-    mesh.edges.foreach_set('select', [False] * edges)
-    mesh.vertices.foreach_set('select', [False] * vertices)
+                    attr.data.foreach_set('value', buffer[:len(elements)])
 
-    mesh.update()
+                else:
+                    elements.foreach_set(prop, buffer[:len(elements)])
 
+    for mesh in meshes:
+        mesh.update()
 
-def select(mesh):
-    mesh.polygons.foreach_set('select', [True] * len(mesh.polygons))
-    mesh.edges.foreach_set('select', [True] * len(mesh.edges))
-    mesh.vertices.foreach_set('select', [True] * len(mesh.vertices))
 
-    mesh.update()
+def hide_meshes(meshes):
+    set_mesh_states(meshes, hide=True)
+
+
+def unhide_meshes(meshes):
+    set_mesh_states(meshes, hide=False)
+
+
+def unhide_select_meshes(meshes):
+    set_mesh_states(meshes, hide=False, select=True)
+
+
+def unhide_deselect_meshes(meshes):
+    set_mesh_states(meshes, hide=False, select=False)
+
+
+def select_meshes(meshes):
+    set_mesh_states(meshes, select=True)
+
+
+def deselect_meshes(meshes):
+    set_mesh_states(meshes, select=False)
+
+
+def hide(mesh):
+    hide_meshes([mesh])
+
+
+def unhide(mesh):
+    unhide_meshes([mesh])
+
+
+def unhide_select(mesh):
+    unhide_select_meshes([mesh])
+
+
+def unhide_deselect(mesh):
+    unhide_deselect_meshes([mesh])
+
+
+def select(mesh):
+    select_meshes([mesh])
 
 
 def deselect(mesh):
-    mesh.polygons.foreach_set('select', [False] * len(mesh.polygons))
-    mesh.edges.foreach_set('select', [False] * len(mesh.edges))
-    mesh.vertices.foreach_set('select', [False] * len(mesh.vertices))
+    deselect_meshes([mesh])
+
+
+def get_face_mask(mesh, prop):
+    '''
+    get a bool array of the hidden, visible or selected faces, read via foreach_get
+    '''
+
+    mask = np.empty(len(mesh.polygons), dtype=bool)
+
+    if prop == "hidden":
+        mesh.polygons.foreach_get('hide', mask)
+
+    elif prop == "visible":
+        mesh.polygons.foreach_get('hide', mask)
+        np.logical_not(mask, out=mask)
+
+    elif prop == "selected":
+        mesh.polygons.foreach_get('select', mask)
+
+    return mask
+
+
+def blast(mesh, prop, type):
+    '''
+    delete the hidden, visible or selected faces, using the passed in bmesh.ops.delete() context
+    the faces are found via foreach_get, and a bmesh is only created, if there's actually anything to delete
+    '''
+
+    indices = np.flatnonzero(get_face_mask(mesh, prop))
 
+    if not len(indices):
+        return
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.faces.ensure_lookup_table()
+
+    faces = [bm.faces[idx] for idx in indices.tolist()]
+
+    bmesh.ops.delete(bm, geom=faces, context=type)
+
+    bm.to_mesh(mesh)
+    bm.free()
+
+
+def smooth(mesh, smooth=True):
+    mesh.polygons.foreach_set('use_smooth', np.full(len(mesh.polygons), smooth, dtype=bool))
     mesh.update()
 
+
+def flip_normals(mesh):
+    '''
+    flip the normals of all faces, via Mesh.flip_normals() where available, it's not exposed in all supported Blender versions
+    '''
+
+    if hasattr(mesh, 'flip_normals'):
+        mesh.flip_normals()
+        mesh.update()
+
+    else:
+        flip_normals_bmesh(mesh)
+
+
 # BMESH
 
-def blast(mesh, prop, type):
+def blast_bmesh(mesh, prop, type):
     bm = bmesh.new()
     bm.from_mesh(mesh)
     bm.normal_update()
@@ -130,7 +265,7 @@ def blast(mesh, prop, type):
     bm.clear()
 
 
-def smooth(mesh, smooth=True):
+def smooth_bmesh(mesh, smooth=True):
     bm = bmesh.new()
     bm.from_mesh(mesh)
     bm.normal_update()
@@ -143,7 +278,7 @@ def smooth(mesh, smooth=True):
     bm.free()
 
 
-def flip_normals(mesh):
+def flip_normals_bmesh(mesh):
     bm = bmesh.new()
     bm.from_mesh(mesh)
     bm.normal_update()
@@ -153,51 +288,284 @@ def flip_normals(mesh):
     bm.free()
 
 
+def get_loop_faces(loop_starts, loop_totals):
+    '''
+    map each loop to the index of the face it belongs to, via the faces' loop starts and totals
+    unlike np.repeat(np.arange(face_count), loop_totals), this doesn't rely on the loops being stored in face order, which is only guaranteed since Blender 4.0
+    '''
+
+    face_count = len(loop_starts)
+
+    faces = np.repeat(np.arange(face_count), loop_totals)
+
+    # the position of each loop within its face
+    firsts = np.zeros(face_count, dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=firsts[1:])
+    corners = np.arange(len(faces)) - np.repeat(firsts, loop_totals)
+
+    loop_faces = np.empty(len(faces), dtype=np.int64)
+    loop_faces[np.repeat(loop_starts, loop_totals) + corners] = faces
+
+    return loop_faces
+
+
+# generic attribute data types, and the foreach property, width and dtype to read them with
+attribute_types = {'FLOAT': ('value', 1, np.float32),
+                   'INT': ('value', 1, np.int32),
+                   'INT8': ('value', 1, np.int32),
+                   'BOOLEAN': ('value', 1, bool),
+                   'FLOAT2': ('vector', 2, np.float32),
+                   'INT32_2D': ('value', 2, np.int32),
+                   'FLOAT_VECTOR': ('vector', 3, np.float32),
+                   'QUATERNION': ('value', 4, np.float32),
+                   'FLOAT_COLOR': ('color', 4, np.float32),
+                   'BYTE_COLOR': ('color', 4, np.float32)}
+
+# attributes join() writes on its own, on newer Blender versions some of the mesh properties are stored as attributes too
+join_skip_attributes = {'position', 'material_index', 'sharp_face', 'sharp_edge', 'Machin3FaceSelect'}
+
+# the attribute domains, and the index into a mesh's (vert, edge, loop, face) counts
+attribute_domains = {'POINT': 0, 'EDGE': 1, 'CORNER': 2, 'FACE': 3}
+
+
+def get_mesh_arrays(mesh, mx=None):
+    '''
+    read a mesh's topology, as well as the edge, face and loop properties and the generic attributes carried over when joining, via foreach_get
+    the vert coords are optionally transformed by mx, the mesh itself is never modified
+    '''
+
+    vert_count = len(mesh.vertices)
+    edge_count = len(mesh.edges)
+    loop_count = len(mesh.loops)
+    poly_count = len(mesh.polygons)
+
+    arrays = {}
+
+    arrays['co'] = get_coords(mesh, mx=mx)
+
+    arrays['edges'] = np.empty((edge_count, 2), dtype=np.int32)
+    mesh.edges.foreach_get('vertices', arrays['edges'].ravel())
+
+    for prop in ['use_seam', 'use_edge_sharp']:
+        arrays[prop] = np.empty(edge_count, dtype=bool)
+        mesh.edges.foreach_get(prop, arrays[prop])
+
+    for prop in ['vertex_index', 'edge_index']:
+        arrays[prop] = np.empty(loop_count, dtype=np.int32)
+        mesh.loops.foreach_get(prop, arrays[prop])
+
+    for prop in ['loop_start', 'loop_total', 'material_index']:
+        arrays[prop] = np.empty(poly_count, dtype=np.int32)
+        mesh.polygons.foreach_get(prop, arrays[prop])
+
+    arrays['use_smooth'] = np.empty(poly_count, dtype=bool)
+    mesh.polygons.foreach_get('use_smooth', arrays['use_smooth'])
+
+    arrays['uvs'] = {}
+
+    for uvs in mesh.uv_layers:
+        arrays['uvs'][uvs.name] = np.empty((loop_count, 2), dtype=np.float32)
+        uvs.data.foreach_get('uv', arrays['uvs'][uvs.name].ravel())
+
+    # edge creases and bevel weights are generic attributes since Blender 4.0
+    if bpy.app.version < (4, 0, 0):
+        for prop in ['crease', 'bevel_weight']:
+            arrays[prop] = np.empty(edge_count, dtype=np.float32)
+            mesh.edges.foreach_get(prop, arrays[prop])
+
+    arrays['attributes'] = {}
+
+    for attr in mesh.attributes:
+        if attr.name.startswith('.') or attr.name in join_skip_attributes or attr.name in arrays['uvs'] or attr.data_type not in attribute_types:
+            continue
+
+        prop, width, dtype = attribute_types[attr.data_type]
+
+        values = np.empty((len(attr.data), width), dtype=dtype)
+        attr.data.foreach_get(prop, values.ravel())
+
+        arrays['attributes'][attr.name] = (attr.domain, attr.data_type, values)
+
+    arrays['counts'] = (vert_count, edge_count, loop_count, poly_count)
+
+    return arrays
+
+
 def join(target, objects, select=[]):
+    '''
+    join the meshes of the passed in objects into the target, and remove them afterwards
+    all meshes are read via foreach_get, the sources are transformed into the target's local space as arrays, and appended to the target's mesh in one go
+    carried over are seams, sharp edges, creases, bevel weights, material indices, smooth flags, UVs, generic attributes like color attributes, and vertex groups
+    NOTE: custom split normals of the sources are not carried over
+    the faces of each object are tagged with the object's index + 1 in the Machin3FaceSelect int face attribute, and those of objects in the select list are selected
+    '''
+
+    mesh = target.data
     mxi = target.matrix_world.inverted_safe()
 
-    bm = bmesh.new()
-    bm.from_mesh(target.data)
-    bm.normal_update()
-    bm.verts.ensure_lookup_table()
+    if any([obj.data.use_auto_smooth for obj in objects]):
+        mesh.use_auto_smooth = True
 
-    select_layer = bm.faces.layers.int.get('Machin3FaceSelect')
+    all_arrays = [get_mesh_arrays(mesh)] + [get_mesh_arrays(obj.data, mx=mxi @ obj.matrix_world) for obj in objects]
 
-    if not select_layer:
-        select_layer = bm.faces.layers.int.new('Machin3FaceSelect')
 
-    if any([obj.data.use_auto_smooth for obj in objects]):
-        target.data.use_auto_smooth = True
+    # OFFSETS
+
+    counts = np.array([arrays['counts'] for arrays in all_arrays], dtype=np.int64)
+    offsets = np.zeros_like(counts)
+    np.cumsum(counts[:-1], axis=0, out=offsets[1:])
+
+    vert_count, edge_count, loop_count, poly_count = counts.sum(axis=0).tolist()
+
+    def concat(prop, offset=None):
+        if offset is None:
+            return np.concatenate([arrays[prop] for arrays in all_arrays])
+        return np.concatenate([arrays[prop] + offsets[idx, offset] for idx, arrays in enumerate(all_arrays)])
+
+
+    # APPEND
+
+    mesh.vertices.add(vert_count - len(mesh.vertices))
+    mesh.edges.add(edge_count - len(mesh.edges))
+    mesh.loops.add(loop_count - len(mesh.loops))
+    mesh.polygons.add(poly_count - len(mesh.polygons))
+
+    mesh.vertices.foreach_set('co', concat('co').ravel())
+
+    mesh.edges.foreach_set('vertices', concat('edges', offset=0).ravel())
+    mesh.edges.foreach_set('use_seam', concat('use_seam'))
+    mesh.edges.foreach_set('use_edge_sharp', concat('use_edge_sharp'))
+
+    loop_verts = concat('vertex_index', offset=0)
+    loop_edges = concat('edge_index', offset=1)
+    mesh.loops.foreach_set('vertex_index', loop_verts)
+    mesh.loops.foreach_set('edge_index', loop_edges)
+
+    loop_totals = concat('loop_total')
+    mesh.polygons.foreach_set('loop_start', concat('loop_start', offset=2))
+
+    # since 4.0, the loop totals are derived from the loop starts
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set('loop_total', loop_totals)
+
+    mesh.polygons.foreach_set('material_index', concat('material_index'))
+    mesh.polygons.foreach_set('use_smooth', concat('use_smooth'))
+
+
+    # UVS
+
+    names = list(dict.fromkeys(name for arrays in all_arrays for name in arrays['uvs']))
+
+    for name in names:
+        uvs = mesh.uv_layers.get(name) or mesh.uv_layers.new(name=name)
+
+        if uvs:
+            uv_coords = np.concatenate([arrays['uvs'].get(name, np.zeros((arrays['counts'][2], 2), dtype=np.float32)) for arrays in all_arrays])
+            uvs.data.foreach_set('uv', uv_coords.ravel())
+
+
+    # CREASES and BEVEL WEIGHTS
+
+    if bpy.app.version < (4, 0, 0):
+        for prop, flag in [('crease', 'use_customdata_edge_crease'), ('bevel_weight', 'use_customdata_edge_bevel')]:
+            values = concat(prop)
+
+            if values.any():
+                setattr(mesh, flag, True)
+                mesh.edges.foreach_set(prop, values)
+
+
+    # ATTRIBUTES
+
+    attributes = {}
+
+    for arrays in all_arrays:
+        for name, (domain, data_type, _) in arrays['attributes'].items():
+            attributes.setdefault(name, (domain, data_type))
+
+    for name, (domain, data_type) in attributes.items():
+        attr = mesh.attributes.get(name)
+
+        if not attr:
+            attr = mesh.attributes.new(name, data_type, domain)
+
+        # skip attributes, that exist with different domains or types, as their values can't be combined
+        if attr.domain != domain or attr.data_type != data_type:
+            continue
+
+        prop, width, dtype = attribute_types[data_type]
+        count_idx = attribute_domains[domain]
+
+        values = []
+
+        for arrays in all_arrays:
+            attribute = arrays['attributes'].get(name)
+
+            if attribute and attribute[:2] == (domain, data_type):
+                values.append(attribute[2])
+            else:
+                values.append(np.zeros((arrays['counts'][count_idx], width), dtype=dtype))
+
+        attr.data.foreach_set(prop, np.concatenate(values).ravel())
+
+
+    # VERTEX GROUPS
 
     for idx, obj in enumerate(objects):
-        mesh = obj.data
-        mx = obj.matrix_world
-        mesh.transform(mxi @ mx)
+        if not obj.vertex_groups:
+            continue
+
+        offset = int(offsets[idx + 1, 0])
+        groups = {vg.index: target.vertex_groups.get(vg.name) or target.vertex_groups.new(name=vg.name) for vg in obj.vertex_groups}
+
+        # collect the vert indices per group and weight, so each can be added in one go
+        weights = {}
+
+        for v in obj.data.vertices:
+            for g in v.groups:
+                weights.setdefault((g.group, g.weight), []).append(v.index + offset)
 
-        bmm = bmesh.new()
-        bmm.from_mesh(mesh)
-        bmm.normal_update()
-        bmm.verts.ensure_lookup_table()
+        for (group, weight), indices in weights.items():
+            if group in groups:
+                groups[group].add(indices, weight, 'REPLACE')
 
-        obj_select_layer = bmm.faces.layers.int.get('Machin3FaceSelect')
 
-        if not obj_select_layer:
-            obj_select_layer = bmm.faces.layers.int.new('Machin3FaceSelect')
+    # FACE TAGS
 
-        for f in bmm.faces:
-            f[obj_select_layer] = idx + 1
+    tag = mesh.attributes.get('Machin3FaceSelect')
 
-        bmm.to_mesh(mesh)
-        bmm.free()
+    if not tag:
+        tag = mesh.attributes.new('Machin3FaceSelect', 'INT', 'FACE')
 
-        bm.from_mesh(mesh)
+    tags = np.zeros(poly_count, dtype=np.int32)
+    tag.data.foreach_get('value', tags)
 
-        bpy.data.meshes.remove(mesh, do_unlink=True)
+    for idx in range(len(objects)):
+        start, end = offsets[idx + 1, 3], offsets[idx + 1, 3] + counts[idx + 1, 3]
+        tags[start:end] = idx + 1
+
+    tag.data.foreach_set('value', tags)
+
+
+    # SELECT
 
     if select:
-        for f in bm.faces:
-            if f[select_layer] in select:
-                f.select_set(True)
+        face_select = np.isin(tags, select)
 
-    bm.to_mesh(target.data)
-    bm.free()
+        loop_select = face_select[get_loop_faces(concat('loop_start', offset=2), loop_totals)]
+
+        for elements, selected in [(mesh.polygons, face_select), (mesh.vertices, loop_verts[loop_select]), (mesh.edges, loop_edges[loop_select])]:
+            selection = np.empty(len(elements), dtype=bool)
+            elements.foreach_get('select', selection)
+
+            if selected.dtype == bool:
+                selection |= selected
+            else:
+                selection[selected] = True
+
+            elements.foreach_set('select', selection)
+
+    mesh.update()
+
+    for obj in objects:
+        bpy.data.meshes.remove(obj.data, do_unlink=True)
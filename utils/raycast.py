@@ -1,20 +1,26 @@
 import bpy
+from mathutils import Vector
 from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d
-import bmesh
-from mathutils.bvhtree import BVHTree as BVH
+import numpy as np
 import sys
+from . bvh import bvh_cache, BVHEntry
 
 
 # RAYCASTING BVH
 
-def cast_bvh_ray_from_mouse(mousepos, candidates=None, bmeshes={}, bvhs={}, debug=False):
+def cast_bvh_ray_from_mouse(mousepos, candidates=None, debug=False):
+    '''
+    raycast the candidates' meshes using BVHs from the session wide BVH cache
+    so they are only (re-)built if the mesh is new to the cache, or its geometry changed since
+    '''
+
     region = bpy.context.region
     region_data = bpy.context.region_data
 
     origin_3d = region_2d_to_origin_3d(region, region_data, mousepos)
     vector_3d = region_2d_to_vector_3d(region, region_data, mousepos)
 
-    objects = [(obj, None) for obj in candidates if obj.type == "MESH"]
+    objects = [obj for obj in candidates if obj.type == "MESH"]
 
     hitobj = None
     hitlocation = None
@@ -22,36 +28,14 @@ def cast_bvh_ray_from_mouse(mousepos, candidates=None, bmeshes={}, bvhs={}, debu
     hitindex = None
     hitdistance = sys.maxsize
 
-    cache = {'bmesh': {},
-             'bvh': {}}
-
-    for obj, src in objects:
+    for obj in objects:
         mx = obj.matrix_world
         mxi = mx.inverted_safe()
 
         ray_origin = mxi @ origin_3d
         ray_direction = mxi.to_3x3() @ vector_3d
 
-        # use cached bmesh if possible
-        if obj.name in bmeshes:
-            # print("fetching existing bmesh")
-            bm = bmeshes[obj.name]
-        else:
-            # print("creating new bmesh")
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            cache['bmesh'][obj.name] = bm
-
-        # use cached bvh if possible
-        if obj.name in bvhs:
-            # print("fetching exsiting BVH")
-            bvh = bvhs[obj.name]
-        else:
-            # print("creating new BVH")
-            bvh = BVH.FromBMesh(bm)
-            cache['bvh'][obj.name] = bvh
-
-        location, normal, index, distance = bvh.ray_cast(ray_origin, ray_direction)
+        location, normal, index, distance = bvh_cache.get(obj).ray_cast(ray_origin, ray_direction)
 
         # recalculate distance in worldspace
         if distance:
@@ -69,10 +53,9 @@ def cast_bvh_ray_from_mouse(mousepos, candidates=None, bmeshes={}, bvhs={}, debu
         print()
 
     if hitobj:
-        return hitobj, hitlocation, hitnormal, hitindex, hitdistance, cache
+        return hitobj, hitlocation, hitnormal, hitindex, hitdistance
 
-    # the cache is always returned!
-    return None, None, None, None, None, cache
+    return None, None, None, None, None
 
 
 # RAYCASTING OBJ
@@ -88,7 +71,8 @@ def cast_obj_ray_from_mouse(mousepos, depsgraph=None, candidates=None, debug=Fal
     if not candidates:
         candidates = bpy.context.visible_objects
 
-    objects = [obj for obj in candidates if obj.type == "MESH"]
+    # the mesh objects among them, and their bounding boxes
+    objects, mins, maxs = box_index.get_boxes(candidates)
 
     hitobj = None
     hitobj_eval = None
@@ -97,7 +81,20 @@ def cast_obj_ray_from_mouse(mousepos, depsgraph=None, candidates=None, debug=Fal
     hitindex = None
     hitdistance = sys.maxsize
 
-    for obj in objects:
+    if not objects:
+        return None, None, None, None, None, None
+
+    # broadphase, only cast on objects whose bounding box is hit, and in order of where the ray enters them
+    entries = intersect_rays_boxes(np.array([origin_3d]), np.array([vector_3d]), mins, maxs)[0]
+
+    for idx in np.argsort(entries):
+
+        # no hit can be closer than where the ray enters the box, so once the best hit is closer, all remaining objects can be skipped
+        if entries[idx] == np.inf or entries[idx] >= hitdistance:
+            break
+
+        obj = objects[idx]
+
         mx = obj.matrix_world
         mxi = mx.inverted_safe()
 
@@ -135,9 +132,22 @@ def get_closest(origin, candidates=[], depsgraph=None, debug=False):
     if not candidates:
         candidates = bpy.context.visible_objects
 
-    objects = [obj for obj in candidates if obj.type == 'MESH']
+    # the mesh objects among them, and their bounding boxes
+    objects, mins, maxs = box_index.get_boxes(candidates)
 
-    for obj in objects:
+    if not objects:
+        return None, None, None, None, None, None
+
+    # broadphase, the distance to an object's bounding box is a lower bound for the distance to its surface
+    bounds = get_point_box_distances(np.array(origin), mins, maxs)
+
+    for idx in np.argsort(bounds):
+
+        # once the nearest point found is closer than the next box, all remaining objects can be skipped
+        if bounds[idx] >= nearestdistance:
+            break
+
+        obj = objects[idx]
         mx = obj.matrix_world
 
         origin_local = mx.inverted_safe() @ origin
@@ -175,7 +185,34 @@ def get_closest(origin, candidates=[], depsgraph=None, debug=False):
 
 # SCENE RAYCASTING
 
-def cast_scene_ray_from_mouse(mousepos, depsgraph, exclude=[], exclude_wire=False, unhide=[], debug=False):
+def cast_remaining_objects(mousepos, depsgraph, exclude, exclude_wire):
+    '''
+    fallback of cast_scene_ray_from_mouse() for rays passing through many faces of excluded objects
+    casts each visible, not excluded object individually, and returns the closest hit in the same form as scene.ray_cast()
+    '''
+
+    candidates = [obj for obj in bpy.context.visible_objects if obj not in exclude and not (exclude_wire and obj.display_type == 'WIRE')]
+
+    if candidates:
+        hitobj, _, hitlocation, hitnormal, hitindex, _ = cast_obj_ray_from_mouse(mousepos, depsgraph=depsgraph, candidates=candidates)
+
+        if hitobj:
+            return True, hitlocation, hitnormal.normalized(), hitindex, hitobj, hitobj.matrix_world.copy()
+
+    return False, None, None, None, None, None
+
+
+def cast_scene_ray_from_mouse(mousepos, depsgraph, exclude=[], exclude_wire=False, unhide=[], snapshots=[], debug=False):
+    '''
+    scene raycast, that ignores excluded objects by continuing the ray from just behind each excluded hit
+    if the ray passes through many faces of an excluded object, like an arrayed cutter, the remaining objects are cast individually instead
+    objects in the unhide list are hidden static duplicates, usefuly if you want to self.snap edit mesh objects
+    these are raycast directly via the BVH cache, so visibility is never changed, which would tag the depsgraph on every cast
+    NOTE: the BVH cache is built from the original mesh, so modifiers of unhide objects are ignored, which suits edit mesh duplicates, whose modifiers are disabled while snapping
+    to snap on a duplicate including its modifiers, pass a snapshot of the evaluated mesh instead, see Snap._init_alternatives()
+    snapshots are static stand-ins for objects, that aren't in the scene at all, see utils.snap.SnapSnapshot, they are raycast directly too
+    '''
+
     region = bpy.context.region
     region_data = bpy.context.region_data
 
@@ -184,44 +221,54 @@ def cast_scene_ray_from_mouse(mousepos, depsgraph, exclude=[], exclude_wire=Fals
 
     scene = bpy.context.scene
 
-    # temporary unhide obects in the unhide list, usefuly if you want to self.snap edit mesh objects, which is achieved by excluding the active object and snapping on an unchanging duplicate that is hidden
-    for ob in unhide:
-        ob.hide_set(False)
+    origin = view_origin
+    travelled = 0
 
     # initial cast
-    hit, location, normal, index, obj, mx = scene.ray_cast(depsgraph=depsgraph, origin=view_origin, direction=view_dir)
+    hit, location, normal, index, obj, mx = scene.ray_cast(depsgraph=depsgraph, origin=origin, direction=view_dir)
 
+    # additional casts in case the hit object should be excluded, each one continuing past a single excluded face
+    # the walk is bounded by the excluded objects, rather than their faces: once one is hit more often than a closed convex mesh could be, it's abandoned
+    hits = {}
 
-    # objects are excluded by temporary hiding them, collect them to reveal them at the end
-    hidden = []
+    while hit and (obj in exclude or (exclude_wire and obj.display_type == 'WIRE')):
+        hits[obj] = hits.get(obj, 0) + 1
 
-    # additional casts in case the hit object should be excluded
-    if hit:
-        if obj in exclude or (exclude_wire and obj.display_type == 'WIRE'):
-            ignore = True
+        if hits[obj] > 2:
+            if debug:
+                print(" Too many faces of", obj.name, "along the ray, casting the remaining objects individually")
+
+            hit, location, normal, index, obj, mx = cast_remaining_objects(mousepos, depsgraph, exclude, exclude_wire)
+            break
+
+        if debug:
+            print(" Ignoring object", obj.name)
+
+        # continue just past the excluded hit
+        distance = (location - origin).length
+        offset = max(0.00001, (travelled + distance) * 0.000001)
+
+        travelled += distance + offset
+        origin = location + view_dir * offset
 
-            while ignore:
-                if debug:
-                    print(" Ignoring object", obj.name)
+        hit, location, normal, index, obj, mx = scene.ray_cast(depsgraph=depsgraph, origin=origin, direction=view_dir)
 
-                # temporarily hide and collect excluded object
-                obj.hide_set(True)
-                hidden.append(obj)
+    hitdistance = (location - view_origin).length if hit else sys.maxsize
 
-                hit, location, normal, index, obj, mx = scene.ray_cast(depsgraph=depsgraph, origin=view_origin, direction=view_dir)
+    # cast the hidden duplicates and snapshots directly, and use them if they are hit closer
+    direct = [(ob, bvh_cache.get(ob)) for ob in unhide] + [(snapshot.obj, snapshot) for snapshot in snapshots]
 
-                if hit:
-                    ignore = obj in exclude or (exclude_wire and obj.display_type == 'WIRE')
-                else:
-                    break
+    for ob, bvh in direct:
+        obmx = ob.matrix_world
+        obmxi = obmx.inverted_safe()
 
-    # hide the unhide objects again
-    for ob in unhide:
-        ob.hide_set(True)
+        oblocation, obnormal, obindex, _ = bvh.ray_cast(obmxi @ view_origin, obmxi.to_3x3() @ view_dir)
 
-    # reveal hidden objects again
-    for ob in hidden:
-        ob.hide_set(False)
+        if oblocation:
+            distance = (obmx @ oblocation - view_origin).length
+
+            if distance < hitdistance:
+                hit, location, normal, index, obj, mx, hitdistance = True, obmx @ oblocation, (obmxi.transposed().to_3x3() @ obnormal).normalized(), obindex, ob, obmx.copy(), distance
 
     if hit:
         if debug:
@@ -234,3 +281,299 @@ def cast_scene_ray_from_mouse(mousepos, depsgraph, exclude=[], exclude_wire=Fals
             print(None)
 
         return None, None, None, None, None, None
+
+
+# BATCHED RAYCASTING
+
+def get_region_rays(region, region_data, coords):
+    '''
+    vectorized region_2d_to_origin_3d() and region_2d_to_vector_3d() for an (N, 2) array of region coords
+    '''
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+    viewinv = np.array(region_data.view_matrix.inverted())
+    persinv = np.array(region_data.perspective_matrix.inverted())
+
+    ndc = np.empty((len(coords), 3))
+    ndc[:, 0] = 2 * coords[:, 0] / region.width - 1
+    ndc[:, 1] = 2 * coords[:, 1] / region.height - 1
+    ndc[:, 2] = -0.5
+
+    if region_data.is_perspective:
+        origins = np.repeat(viewinv[np.newaxis, :3, 3], len(coords), axis=0)
+
+        w = ndc @ persinv[3, :3] + persinv[3, 3]
+        directions = (ndc @ persinv[:3, :3].T + persinv[:3, 3]) / w[:, np.newaxis] - origins
+
+    else:
+        origins = ndc[:, :1] * persinv[:3, 0] + ndc[:, 1:2] * persinv[:3, 1] + persinv[:3, 3]
+
+        # outside of camera view, the ray origin is moved back by the far clip distance, see region_2d_to_origin_3d()
+        if region_data.view_perspective != 'CAMERA':
+            origins -= persinv[:3, 2]
+
+        directions = np.repeat(-viewinv[np.newaxis, :3, 2], len(coords), axis=0)
+
+    directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+
+    return origins, directions
+
+
+def intersect_rays_boxes(origins, directions, mins, maxs):
+    '''
+    vectorized slab test of N rays against B axis aligned boxes, given as (B, 3) min and max corners
+    return an (N, B) array of ray parameters at which each ray enters each box, 0 for rays starting inside a box, and inf for misses
+    '''
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1 / directions[:, np.newaxis]
+
+        t1 = (mins[np.newaxis] - origins[:, np.newaxis]) * inv
+        t2 = (maxs[np.newaxis] - origins[:, np.newaxis]) * inv
+
+    # nan means a ray parallel to and right on a slab plane, which counts as inside the slab
+    near = np.minimum(t1, t2)
+    far = np.maximum(t1, t2)
+
+    near[np.isnan(near)] = -np.inf
+    far[np.isnan(far)] = np.inf
+
+    near = near.max(axis=2)
+    far = far.min(axis=2)
+
+    hit = (near <= far) & (far >= 0)
+
+    return np.where(hit, np.maximum(near, 0), np.inf)
+
+
+def get_object_bvh(obj, depsgraph=None):
+    '''
+    return a BVHEntry for the object, whose ray_cast() returns polygon indices
+    the original mesh's BVH is fetched from the BVH cache, the evaluated mesh's BVH is built from a temporary mesh, that isn't added to bpy.data
+    objects without enabled modifiers or shape keys evaluate to their original mesh, so the cached BVH is used for them even with a depsgraph
+    '''
+
+    if depsgraph and (obj.data.shape_keys or any(mod.show_viewport for mod in obj.modifiers)):
+        obj_eval = obj.evaluated_get(depsgraph)
+        mesh = obj_eval.to_mesh()
+
+        entry = BVHEntry(mesh, None)
+
+        obj_eval.to_mesh_clear()
+        return entry
+
+    return bvh_cache.get(obj)
+
+
+def cast_rays(origins, directions, candidates=None, depsgraph=None, debug=False):
+    '''
+    cast (N, 3) world space rays against the candidate objects' evaluated meshes in one go, using the context's evaluated depsgraph, if none is passed in
+    rays missing an object's bounding box are culled for all rays at once, the remaining ones are cast through the object's BVH
+    return (N, ) hit object indices into the candidates, or into context.visible_objects, if no candidates are passed in
+    as well as locations, normals, face indices and distances as arrays
+    misses have an object and face index of -1, nan locations and normals, and an inf distance
+    '''
+
+    if not candidates:
+        candidates = bpy.context.visible_objects
+
+    # like cast_obj_ray_from_mouse(), cast against the evaluated geometry, which is what the bounding boxes are taken from too
+    if not depsgraph:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    directions = directions / np.linalg.norm(directions, axis=1)[:, np.newaxis]
+
+    count = len(origins)
+
+    hitobjs = np.full(count, -1, dtype=np.int32)
+    hitlocations = np.full((count, 3), np.nan)
+    hitnormals = np.full((count, 3), np.nan)
+    hitindices = np.full(count, -1, dtype=np.int32)
+    hitdistances = np.full(count, np.inf)
+
+    for idx, obj in enumerate(candidates):
+        if obj.type != 'MESH':
+            continue
+
+        mx = obj.matrix_world
+        mxi = mx.inverted_safe()
+
+        mxi_np = np.array(mxi)
+
+        # bring the rays into local space, the ray parameter t is the same in both spaces
+        local_origins = origins @ mxi_np[:3, :3].T + mxi_np[:3, 3]
+        local_directions = directions @ mxi_np[:3, :3].T
+
+        # skip rays, that miss the object's bounding box, or that already hit something closer
+        bbox = np.array(obj.evaluated_get(depsgraph).bound_box)
+        rays = np.flatnonzero(intersect_rays_boxes(local_origins, local_directions, bbox.min(axis=0)[np.newaxis], bbox.max(axis=0)[np.newaxis])[:, 0] < hitdistances)
+
+        if not len(rays):
+            continue
+
+        bvh = get_object_bvh(obj, depsgraph=depsgraph)
+
+        if not len(bvh.tris):
+            continue
+
+        mxn = mxi.transposed().to_3x3()
+        hits = 0
+
+        for ray, origin, direction in zip(rays.tolist(), local_origins[rays].tolist(), local_directions[rays].tolist()):
+            location, normal, index, _ = bvh.ray_cast(origin, direction)
+
+            if location:
+                location = mx @ location
+                distance = (location - Vector(origins[ray])).length
+
+                if distance < hitdistances[ray]:
+                    hitobjs[ray] = idx
+                    hitlocations[ray] = location
+                    hitnormals[ray] = (mxn @ normal).normalized()
+                    hitindices[ray] = index
+                    hitdistances[ray] = distance
+
+                    hits += 1
+
+        if debug:
+            print("candidate:", obj.name, hits, "closer hits")
+
+    return hitobjs, hitlocations, hitnormals, hitindices, hitdistances
+
+
+def cast_rays_from_region(coords, candidates=None, depsgraph=None, debug=False):
+    '''
+    batched cast_obj_ray_from_mouse(), for an (N, 2) array of region coords
+    '''
+
+    origins, directions = get_region_rays(bpy.context.region, bpy.context.region_data, coords)
+    return cast_rays(origins, directions, candidates=candidates, depsgraph=depsgraph, debug=debug)
+
+
+# BROADPHASE
+
+def get_world_bboxes(objects):
+    '''
+    return the world space axis aligned bounding boxes of the passed in objects as (N, 3) min and max corner arrays
+    '''
+
+    corners = np.array([obj.bound_box for obj in objects], dtype=np.float64)
+    mxs = np.array([obj.matrix_world for obj in objects], dtype=np.float64)
+
+    world = np.einsum('nij,nkj->nki', mxs[:, :3, :3], corners) + mxs[:, np.newaxis, :3, 3]
+
+    return world.min(axis=1), world.max(axis=1)
+
+
+def get_point_box_distances(point, mins, maxs):
+    '''
+    return the distances of a point to (N, 3) axis aligned boxes, 0 for boxes containing the point
+    '''
+
+    offset = np.maximum(np.maximum(mins - point, 0), point - maxs)
+    return np.linalg.norm(offset, axis=1)
+
+
+class BoxIndex:
+    '''
+    session wide index of mesh objects' world space bounding boxes, stored as rows of min and max corner arrays, keyed on the objects' session_uid
+    boxes are only (re-)computed for objects new to the index, or marked dirty by the depsgraph dispatcher after transform or geometry changes
+    frame changes don't run through the dispatcher, so the index is cleared by the frame_change_post handler instead, as stale boxes would cull actual hits
+    this way the broadphase of get_closest() and cast_obj_ray_from_mouse() doesn't need to read every object's bound_box and matrix_world on each call
+
+    the last query's candidates, their mesh objects and rows are kept, so repeated queries on the same candidates, like while dragging, only do Python work for dirty objects
+    the boxes themselves are tested linearly, as a single vectorized numpy pass over the rows, which for the object counts of a scene is cheaper than building and walking a hierarchy in Python
+    rows of deleted objects are pruned, once the index holds considerably more rows than there are objects
+    '''
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.rows = {}
+        self.dirty = {}
+
+        self.mins = np.empty((0, 3), dtype=np.float64)
+        self.maxs = np.empty((0, 3), dtype=np.float64)
+
+        self.query = None
+
+    def invalidate(self, objects):
+        uids = {obj.session_uid: obj for obj in objects}
+
+        self.dirty.update({uid: obj for uid, obj in uids.items() if uid in self.rows})
+
+        # objects new to the index, could be in the memory of deleted ones, and so compare equal to the last query's candidates
+        if any(uid not in self.rows for uid in uids):
+            self.query = None
+
+    def get_boxes(self, candidates):
+        '''
+        return the mesh objects among the passed in candidates, and the (N, 3) min and max corners of their boxes, updating only new and dirty ones
+        '''
+
+        candidates = tuple(candidates)
+
+        if self.query and self.query[0] == candidates:
+            _, objects, uids, rows = self.query
+
+        else:
+            objects = [obj for obj in candidates if obj.type == 'MESH']
+            uids = {obj.session_uid: obj for obj in objects}
+
+            new = [obj for uid, obj in uids.items() if uid not in self.rows]
+
+            if new:
+                self._add(new)
+
+            rows = np.fromiter((self.rows[uid] for uid in uids), dtype=np.int64, count=len(uids))
+
+            self.query = (candidates, objects, uids, rows)
+
+        if self.dirty:
+            update = {uid: obj for uid, obj in self.dirty.items() if uid in uids}
+
+            if update:
+                dirty_rows = [self.rows[uid] for uid in update]
+                self.mins[dirty_rows], self.maxs[dirty_rows] = get_world_bboxes(list(update.values()))
+
+                for uid in update:
+                    del self.dirty[uid]
+
+        return objects, self.mins[rows], self.maxs[rows]
+
+    def _add(self, objects):
+        '''
+        append rows for objects new to the index, and prune the rows of deleted objects, if there are too many
+        '''
+
+        if len(self.rows) + len(objects) > 2 * len(bpy.data.objects) + 64:
+            self._prune()
+
+        mins, maxs = get_world_bboxes(objects)
+
+        count = len(self.rows)
+        self.rows.update({obj.session_uid: count + idx for idx, obj in enumerate(objects)})
+
+        self.mins = np.vstack((self.mins, mins))
+        self.maxs = np.vstack((self.maxs, maxs))
+
+    def _prune(self):
+        alive = {obj.session_uid for obj in bpy.data.objects}
+        keep = [(uid, row) for uid, row in self.rows.items() if uid in alive]
+
+        rows = np.array([row for _, row in keep], dtype=np.int64)
+
+        self.rows = {uid: idx for idx, (uid, _) in enumerate(keep)}
+        self.dirty = {uid: obj for uid, obj in self.dirty.items() if uid in self.rows}
+
+        self.mins = self.mins[rows].reshape(-1, 3)
+        self.maxs = self.maxs[rows].reshape(-1, 3)
+
+        self.query = None
+
+
+box_index = BoxIndex()
@@ -4,7 +4,7 @@ import os
 from importlib import import_module
 from .. registration import keys as keysdict
 from .. registration import classes as classesdict
-from .. msgbus import group_name_change, group_color_change
+from .. msgbus import group_name_change, group_color_change, group_empty_change
 
 
 def get_path():
@@ -227,8 +227,11 @@ def unregister_icons(icons):
 
 
 def register_msgbus(owner):
+    from .. properties import M3ObjectProperties
+
     bpy.msgbus.subscribe_rna(key=(bpy.types.Object, 'color'), owner=owner, args=(), notify=group_color_change)
     bpy.msgbus.subscribe_rna(key=(bpy.types.Object, 'name'), owner=owner, args=(), notify=group_name_change)
+    bpy.msgbus.subscribe_rna(key=(M3ObjectProperties, 'is_group_empty'), owner=owner, args=(), notify=group_empty_change)
 
 
 def unregister_msgbus(owner):
@@ -1,40 +1,62 @@
+from collections import deque
+import numpy as np
+from . mesh import get_loop_faces
 
 
 # SORTING
 
-def get_selected_vert_sequences(verts, ensure_seq_len=False, debug=False):
+def walk_vert_sequences(verts, link_edges, stop_on_revisit=False):
     '''
-    return sorted lists of vertices, where vertices are considered connected if their edges are selected, and faces are not selected
+    sort verts into sequences, where link_edges is a dict of each vert and its connecting edges
+    sequences are started from the first vert with a single connecting edge, or from the first vert if there is none, both in the order of the passed in verts
+    each vert is only visited once, sets keep track of visited verts, and indices into the vert lists skip past visited ones to find the next start vert
+
+    a vert, that's revisited from a later sequence, like when edge loops intersect, raises a ValueError, or just stops with stop_on_revisit
     '''
 
     sequences = []
 
+    remaining = set(verts)
+
     # if edge loops are non-cyclic, it matters at what vert you start the sorting
-    noncyclicstartverts = [v for v in verts if len([e for e in v.link_edges if e.select]) == 1]
+    noncyclicstartverts = [v for v in verts if len(link_edges[v]) == 1]
+
+    vidx = 0
+    nidx = 0
 
-    if noncyclicstartverts:
-        v = noncyclicstartverts[0]
+    def get_start_vert():
+        nonlocal vidx, nidx
 
-    # in cyclic edge loops, any vert works
-    else:
-        v = verts[0]
+        while nidx < len(noncyclicstartverts) and noncyclicstartverts[nidx] not in remaining:
+            nidx += 1
+
+        if nidx < len(noncyclicstartverts):
+            return noncyclicstartverts[nidx]
+
+        # in cyclic edge loops, any vert works
+        while verts[vidx] not in remaining:
+            vidx += 1
+
+        return verts[vidx]
+
+    v = get_start_vert()
 
     seq = []
+    seen = set()
 
-    while verts:
+    while remaining:
         seq.append(v)
 
-        # safty precaution,for EPanel, where people may select intersecting edge loops
-        if v not in verts:
-            break
+        if v not in remaining:
+            if stop_on_revisit:
+                break
 
-        else:
-            verts.remove(v)
+            raise ValueError(f"vert {v.index} is part of more than one sequence")
 
-        if v in noncyclicstartverts:
-            noncyclicstartverts.remove(v)
+        remaining.remove(v)
+        seen.add(v)
 
-        nextv = [e.other_vert(v) for e in v.link_edges if e.select and e.other_vert(v) not in seq]
+        nextv = [e.other_vert(v) for e in link_edges[v] if e.other_vert(v) not in seen]
 
         # next vert in sequence
         if nextv:
@@ -43,29 +65,34 @@ def get_selected_vert_sequences(verts, ensure_seq_len=False, debug=False):
         # finished a sequence
         else:
             # determine cyclicity
-            cyclic = True if len([e for e in v.link_edges if e.select]) == 2 else False
+            cyclic = len(link_edges[v]) == 2
 
             # store sequence and cyclicity
             sequences.append((seq, cyclic))
 
             # start a new sequence, if there are still verts left
-            if verts:
-                if noncyclicstartverts:
-                    v = noncyclicstartverts[0]
-                else:
-                    v = verts[0]
+            if remaining:
+                v = get_start_vert()
 
                 seq = []
+                seen = set()
 
-    # again for EPanel, make sure sequences are longer than one vert
-    if ensure_seq_len:
-        seqs = []
+    return sequences
 
-        for seq, cyclic in sequences:
-            if len(seq) > 1:
-                seqs.append((seq, cyclic))
 
-        sequences = seqs
+def get_selected_vert_sequences(verts, ensure_seq_len=False, debug=False):
+    '''
+    return sorted lists of vertices, where vertices are considered connected if their edges are selected, and faces are not selected
+    '''
+
+    link_edges = {v: [e for e in v.link_edges if e.select] for v in verts}
+
+    # safty precaution,for EPanel, where people may select intersecting edge loops
+    sequences = walk_vert_sequences(verts, link_edges, stop_on_revisit=True)
+
+    # again for EPanel, make sure sequences are longer than one vert
+    if ensure_seq_len:
+        sequences = [(seq, cyclic) for seq, cyclic in sequences if len(seq) > 1]
 
     if debug:
         for seq, cyclic in sequences:
@@ -79,49 +106,11 @@ def get_edges_vert_sequences(verts, edges, debug=False):
     return sorted lists of vertices, where vertices are considered connected if they are verts of the passed in edges
     selection states are completely ignored.
     """
-    sequences = []
-
-    # if edge loops are non-cyclic, it matters at what vert you start the sorting
-    noncyclicstartverts = [v for v in verts if len([e for e in v.link_edges if e in edges]) == 1]
-
-    if noncyclicstartverts:
-        v = noncyclicstartverts[0]
 
-    # in cyclic edge loops, any vert works
-    else:
-        v = verts[0]
+    edges = set(edges)
+    link_edges = {v: [e for e in v.link_edges if e in edges] for v in verts}
 
-    seq = []
-
-    while verts:
-        seq.append(v)
-        verts.remove(v)
-
-        if v in noncyclicstartverts:
-            noncyclicstartverts.remove(v)
-
-        nextv = [e.other_vert(v) for e in v.link_edges if e in edges and e.other_vert(v) not in seq]
-
-        # next vert in sequence
-        if nextv:
-            v = nextv[0]
-
-        # finished a sequence
-        else:
-            # determine cyclicity
-            cyclic = True if len([e for e in v.link_edges if e in edges]) == 2 else False
-
-            # store sequence and cyclicity
-            sequences.append((seq, cyclic))
-
-            # start a new sequence, if there are still verts left
-            if verts:
-                if noncyclicstartverts:
-                    v = noncyclicstartverts[0]
-                else:
-                    v = verts[0]
-
-                seq = []
+    sequences = walk_vert_sequences(verts, link_edges)
 
     if debug:
         for verts, cyclic in sequences:
@@ -135,38 +124,40 @@ def get_edges_vert_sequences(verts, edges, debug=False):
 def get_selection_islands(faces, debug=False):
     '''
     return island tuples (verts, edges, faces), sorted by amount of faces in each, highest first
+    islands are grown breadth first across edges, with a set keeping track of all faces already assigned to an island, so every face and edge is only visited once
     '''
 
     if debug:
         print("selected:", [f.index for f in faces])
 
     face_islands = []
+    seen = set()
 
-    while faces:
-        island = [faces[0]]
-        foundmore = [faces[0]]
+    for face in faces:
+        if face in seen:
+            continue
 
-        if debug:
-            print("island:", [f.index for f in island])
-            print("foundmore:", [f.index for f in foundmore])
+        seen.add(face)
+
+        island = [face]
+        foundmore = deque([face])
 
         while foundmore:
-            for e in foundmore[0].edges:
-                # get unseen selected border faces
-                bf = [f for f in e.link_faces if f.select and f not in island]
-                if bf:
-                    island.append(bf[0])
-                    foundmore.append(bf[0])
+            f = foundmore.popleft()
 
             if debug:
-                print("popping", foundmore[0].index)
+                print("popping", f.index)
 
-            foundmore.pop(0)
+            for e in f.edges:
+                # get unseen selected border faces
+                for bf in e.link_faces:
+                    if bf.select and bf not in seen:
+                        seen.add(bf)
 
-        face_islands.append(island)
+                        island.append(bf)
+                        foundmore.append(bf)
 
-        for f in island:
-            faces.remove(f)
+        face_islands.append(island)
 
     if debug:
         print()
@@ -197,9 +188,12 @@ def get_boundary_edges(faces, region_to_loop=False):
     return boundary edges of selected faces
     as boundary, non-manifold edges, as well as edges, haveing any unselected face
     this is faster than mesh.region_to_loop() btw, even with region_to_loop True
+    edges shared by two selected faces are only checked and returned once
     """
 
-    boundary_edges = [e for f in faces for e in f.edges if (not e.is_manifold) or (any(not f.select for f in e.link_faces))]
+    edges = dict.fromkeys(e for f in faces for e in f.edges)
+
+    boundary_edges = [e for e in edges if (not e.is_manifold) or (any(not f.select for f in e.link_faces))]
 
     if region_to_loop:
         for f in faces:
@@ -209,3 +203,66 @@ def get_boundary_edges(faces, region_to_loop=False):
             e.select_set(True)
 
     return boundary_edges
+
+
+def get_mesh_boundary_edges(mesh, region_to_loop=False):
+    """
+    array version of get_boundary_edges(), working on the selected faces of a mesh, rather than a bmesh
+    counts how many selected faces, and how many faces in total use each edge, from the loop edge indices
+    boundary edges are used by at least one selected face, and are either non-manifold, or used by unselected faces too
+    returns the sorted, unique boundary edge indices
+
+    as the selection is read from and written to the mesh, in edit mode update it from the edit mesh first, and load it back afterwards
+    """
+
+    face_count = len(mesh.polygons)
+    edge_count = len(mesh.edges)
+
+    face_select = np.empty(face_count, dtype=bool)
+    mesh.polygons.foreach_get('select', face_select)
+
+    loop_starts = np.empty(face_count, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+
+    loop_totals = np.empty(face_count, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('edge_index', loop_edges)
+
+    loop_select = face_select[get_loop_faces(loop_starts, loop_totals)]
+
+    incidence = np.bincount(loop_edges, minlength=edge_count)
+    selected_incidence = np.bincount(loop_edges[loop_select], minlength=edge_count)
+
+    boundary = (selected_incidence > 0) & ((incidence != 2) | (selected_incidence < incidence))
+    boundary_edges = np.flatnonzero(boundary)
+
+    if region_to_loop:
+        loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_verts)
+
+        edge_verts = np.empty((edge_count, 2), dtype=np.int32)
+        mesh.edges.foreach_get('vertices', edge_verts.ravel())
+
+        vert_select = np.empty(len(mesh.vertices), dtype=bool)
+        mesh.vertices.foreach_get('select', vert_select)
+
+        edge_select = np.empty(edge_count, dtype=bool)
+        mesh.edges.foreach_get('select', edge_select)
+
+        # deselect the faces, including their edges and verts, then select the boundary edges and their verts
+        vert_select[loop_verts[loop_select]] = False
+        edge_select[loop_edges[loop_select]] = False
+        face_select[:] = False
+
+        vert_select[edge_verts[boundary_edges].ravel()] = True
+        edge_select[boundary_edges] = True
+
+        mesh.polygons.foreach_set('select', face_select)
+        mesh.edges.foreach_set('select', edge_select)
+        mesh.vertices.foreach_set('select', vert_select)
+
+        mesh.update()
+
+    return boundary_edges
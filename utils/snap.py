@@ -1,19 +1,14 @@
 import bpy
-import bmesh
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
+from bpy_extras.view3d_utils import region_2d_to_origin_3d, region_2d_to_vector_3d
+import numpy as np
+from collections import OrderedDict
 from . raycast import cast_scene_ray_from_mouse
-
-
-# TODO: add update function to update/re-cache specific object
-# ####: used when the modifiers stack changes, like when HyperBevel adds/removes weld mods
-
-
-# TODO: somehow simplify the Cache structure into self.cache[name].bmeshes, instead of self.cache.bmeshes[name]?
-# ####: this would allow you to do cache = self.cache[name], and then just cache.bmeshes
-
-
-# TODO: actually include vert, edge and face snapping logic here?
-# ####: could be tricky because of how varied it is uses in TransformCursor() alone
-# ####: you'd definitely also expose the view3d drawing coords then, mayby via a SnapDraw() object, or SnapCoords()?
+from . ui import get_zoom_factors
+from . registration import get_prefs
+from . bvh import bvh_cache, get_triangle_arrays, get_geometry_version
 
 
 class Snap:
@@ -29,6 +24,7 @@ class Snap:
     exclude = []
     exclude_wire = False
     alternative = []
+    snapshots = []
 
     hit = None
     hitobj = None
@@ -39,10 +35,16 @@ class Snap:
 
     hitface = None
 
+    snap_element = None
+    snap_index = None
+    snap_location = None
+    snap_coords = []
+    snap_tri_coords = []
+
     _edit_mesh_objs = []
     _modifiers = []
 
-    def __init__(self, context, include=None, exclude=None, exclude_wire=False, alternative=None, debug=False):
+    def __init__(self, context, include=None, exclude=None, exclude_wire=False, alternative=None, snapshot=True, debug=False):
         self.debug = debug
 
         self.log("\nInitialize Snapping")
@@ -54,14 +56,15 @@ class Snap:
         self._init_exclude(context, include, exclude, exclude_wire)
 
         # init alternatives
-        self._init_alternatives(context, alternative)
+        self._init_alternatives(context, alternative, snapshot)
 
         # init depsgraph and cache object
         self.depsgraph = context.evaluated_depsgraph_get()
         self.cache = SnapCache(debug=debug)
 
-        # init hitface
+        # init hitface and snap element
         self.hitface = None
+        self._reset_element()
 
         self.log()
 
@@ -80,7 +83,7 @@ class Snap:
         do a scene raycast from the passed in mouse position
         '''
 
-        self.hit, self.hitobj, self.hitindex, self.hitlocation, self.hitnormal, self.hitmx = cast_scene_ray_from_mouse(mousepos, self.depsgraph, exclude=self.exclude, exclude_wire=self.exclude_wire, unhide=self.alternative, debug=self.debug)
+        self.hit, self.hitobj, self.hitindex, self.hitlocation, self.hitnormal, self.hitmx = cast_scene_ray_from_mouse(mousepos, self.depsgraph, exclude=self.exclude, exclude_wire=self.exclude_wire, snapshots=self.snapshots, debug=self.debug)
 
         if self.hit:
             name = self.hitobj.name
@@ -94,40 +97,42 @@ class Snap:
                 self.cache.objects[name] = self.hitobj
 
 
-                # MESH
+                # GEOMETRY
 
-                mesh = bpy.data.meshes.new_from_object(self.hitobj.evaluated_get(self.depsgraph), depsgraph=self.depsgraph)
-                self.cache.meshes[name] = mesh
+                snapshot = next((snapshot for snapshot in self.snapshots if snapshot.obj == self.hitobj), None)
 
+                if snapshot:
+                    self.cache.geometry[name] = snapshot.geometry
 
-                # BMESH
+                else:
+                    self.cache.add_geometry(name, self.hitobj, self.depsgraph)
 
-                bm = bmesh.new()
-                bm.from_mesh(mesh)
-                # bm.normal_update()
-                bm.verts.ensure_lookup_table()
-                bm.faces.ensure_lookup_table()
-                self.cache.bmeshes[name] = bm
+                self.cache.tri_coords[name] = {}
 
+            geometry = self.cache.geometry[name]
 
-                # LOOP TRIANGLES
 
-                self.cache.loop_triangles[name] = bm.calc_loop_triangles()
-                self.cache.tri_coords[name] = {}
+            # update the following every time the hitface changes
 
+            # NOTE: a hitindex outside of the cached geometry means it has changed since it was cached
+            if self.hitindex >= geometry.face_count:
+                self.log("Hitindex", self.hitindex, "not in cached geometry, re-caching", name)
 
-            # update the following every time the hitface changes
+                snap_cache.remove(self.hitobj)
+                self.cache.add_geometry(name, self.hitobj, self.depsgraph)
+                self.cache.tri_coords[name] = {}
 
-            # TODO: you may still encounter issues where the hitindex is not present in the current bmesh
-            # ####: if you encounter this, you should update the mesh/bmesh
+                geometry = self.cache.geometry[name]
+                self.hitface = None
 
 
             # HITFACE
 
-            if not self.hitface or (self.hitface and self.hitface.index != self.hitindex):
+            if not self.hitface or self.hitface.name != name or self.hitface.index != self.hitindex:
                 self.log("Hitface changed to", self.hitindex)
 
-                self.hitface = self.cache.bmeshes[name].faces[self.hitindex]
+                self.hitface = geometry.get_face(self.hitindex)
+                self.hitface.name = name
 
 
             # TRI COORDS
@@ -135,10 +140,133 @@ class Snap:
             if self.hitindex not in self.cache.tri_coords[name]:
                 self.log("Adding tri coords for face index", self.hitindex)
 
-                loop_triangles = self.cache.loop_triangles[name]
+                self.cache.tri_coords[name][self.hitindex] = geometry.get_tri_coords(self.hitindex, self.hitmx)
+
+    def get_element(self, context, mousepos, radius=10, elements={'VERT', 'EDGE', 'FACE'}):
+        '''
+        find the vert, edge or face of the hit object closest to the mouse, verts are preferred over edges, and edges over faces
+        verts and edges have to be within the passed in radius in pixels, and are searched via the hit object's vert KD-tree and edge segment index
+        with all distances then measured in screen space at once
+
+        requires a previous get_hit() from the same mouse position
+        sets snap_element, snap_index and snap_location, as well as the world space snap_coords and snap_tri_coords, ready to be drawn
+        '''
+
+        self._reset_element()
+
+        if not self.hit:
+            return
+
+        geometry = self.cache.geometry[self.hitobj.name]
+
+        mx = np.array(self.hitmx, dtype=np.float64)
+        mx3, translation = mx[:3, :3], mx[:3, 3]
+
+        mousepos = np.array(mousepos, dtype=np.float64)
+
+        # the pixel radius in local space, at the depth of the hit
+        world_radius = get_zoom_factors(context, np.array([self.hitlocation]), scale=radius)[0]
+        local_radius = world_radius / max(min(self.hitmx.to_scale()), 0.000001)
+
+        local_hit = self.hitmx.inverted_safe() @ self.hitlocation
+        verts = np.array([index for _, index, _ in geometry.get_kdtree().find_range(local_hit, local_radius)], dtype=np.int32)
+
+
+        # VERT
+
+        if 'VERT' in elements and len(verts):
+            coords = geometry.coords[verts] @ mx3.T + translation
+            distances = np.linalg.norm(self._project(context, coords) - mousepos, axis=1)
+
+            idx = np.argmin(distances)
+
+            if distances[idx] <= radius:
+                self.snap_element = 'VERT'
+                self.snap_index = int(verts[idx])
+                self.snap_location = Vector(coords[idx])
+                self.snap_coords = [self.snap_location]
+                return
+
+
+        # EDGE
+
+        if 'EDGE' in elements:
+
+            # the edges of the hitface, and all edges passing within range of the hit
+            edges = np.union1d(geometry.get_face_edges(self.hitindex), geometry.get_edges_in_range(local_hit, local_radius))
+
+            # skip zero length edges, which have no direction to snap or slide along
+            edges = edges[np.any(geometry.coords[geometry.edges[edges, 0]] != geometry.coords[geometry.edges[edges, 1]], axis=1)]
+
+            starts = geometry.coords[geometry.edges[edges, 0]] @ mx3.T + translation
+            ends = geometry.coords[geometry.edges[edges, 1]] @ mx3.T + translation
+
+            # the closest points on each edge to the view ray
+            view_origin = np.array(region_2d_to_origin_3d(context.region, context.region_data, mousepos))
+            view_dir = np.array(region_2d_to_vector_3d(context.region, context.region_data, mousepos))
+
+            edge_dirs = ends - starts
+            offsets = view_origin - starts
+
+            b = edge_dirs @ view_dir
+            c = np.einsum('ij,ij->i', edge_dirs, edge_dirs)
+            d = offsets @ view_dir
+            e = np.einsum('ij,ij->i', edge_dirs, offsets)
+
+            denom = c - b ** 2
+            valid = denom > 1e-12
+
+            factors = np.zeros(len(edges))
+            factors[valid] = (e[valid] - b[valid] * d[valid]) / denom[valid]
+            np.clip(factors, 0, 1, out=factors)
+
+            points = starts + edge_dirs * factors[:, np.newaxis]
+            distances = np.linalg.norm(self._project(context, points) - mousepos, axis=1)
+
+            if len(distances):
+                idx = np.argmin(distances)
+
+                if distances[idx] <= radius:
+                    self.snap_element = 'EDGE'
+                    self.snap_index = int(edges[idx])
+                    self.snap_location = Vector(points[idx])
+                    self.snap_coords = [Vector(starts[idx]), Vector(ends[idx])]
+                    return
+
+
+        # FACE
+
+        if 'FACE' in elements:
+            self.snap_element = 'FACE'
+            self.snap_index = self.hitindex
+            self.snap_location = self.hitlocation.copy()
+            self.snap_coords = [self.hitmx @ v.co for v in self.hitface.verts]
+            self.snap_tri_coords = self.cache.tri_coords[self.hitobj.name][self.hitindex]
+
+    def _project(self, context, coords):
+        '''
+        vectorized location_3d_to_region_2d(), locations behind the view are moved out of reach
+        '''
 
-                tri_coords = [self.hitmx @ l.vert.co for tri in loop_triangles if tri[0].face == self.hitface for l in tri]
-                self.cache.tri_coords[name][self.hitindex] = tri_coords
+        pmx = np.array(context.region_data.perspective_matrix, dtype=np.float64)
+
+        clip = coords @ pmx[:, :3].T + pmx[:, 3]
+        w = clip[:, 3]
+
+        behind = w <= 0
+        w[behind] = 1
+
+        screen = (clip[:, :2] / w[:, np.newaxis] + 1) * (context.region.width / 2, context.region.height / 2)
+        screen[behind] = np.inf
+
+        return screen
+
+    def _reset_element(self):
+        self.snap_element = None
+        self.snap_index = None
+        self.snap_location = None
+        self.snap_coords = []
+        self.snap_tri_coords = []
 
     def _init_edit_mode(self, context):
         '''
@@ -172,35 +300,50 @@ class Snap:
 
         self.exclude_wire = exclude_wire
 
-    def _init_alternatives(self, context, alternative):
+    def _init_alternatives(self, context, alternative, snapshot):
         '''
-        create a duplicate for each object in the alternative list
-        each of the original objects will be exluded from snapping
-        while the duplicates are created hidden, but are temporary revealed when raycasting
-        this is useful for cases where self-snapping on edit mesh objects would lead to twitching, and where static duplicates are snapped on instead
+        each of the objects in the alternative list will be exluded from snapping, and a static stand-in is snapped on instead
+        this is useful for cases where self-snapping on edit mesh objects would lead to twitching
+
+        by default the stand-in is a SnapSnapshot, a frozen copy of the object's mesh arrays and a BVH built from them, which is raycast directly
+        with snapshot=False a hidden duplicate object is created instead, which is snapped on via a snapshot of the original's evaluated mesh, so its modifiers are taken into account
         '''
 
         self.alternative = []
+        self.snapshots = []
 
         if alternative:
             for obj in alternative:
                 if obj not in self.exclude:
                     self.exclude.append(obj)
 
-                dup = obj.copy()
-                dup.data = obj.data.copy()
-                context.scene.collection.objects.link(dup)
-                dup.hide_set(True)
+                if snapshot:
+                    self.snapshots.append(SnapSnapshot(obj))
 
-                self.alternative.append(dup)
+                    self.log(f" Created alternative snapshot for {obj.name}")
 
-                self.log(f" Created alternative object {dup.name} for {obj.name}")
+                else:
+                    dup = obj.copy()
+                    dup.data = obj.data.copy()
+                    context.scene.collection.objects.link(dup)
+                    dup.hide_set(True)
+
+                    self.alternative.append(dup)
+
+                    # the hidden duplicate isn't evaluated, so freeze the original's evaluated mesh, which the duplicate is a copy of
+                    self.snapshots.append(SnapSnapshot(dup, source=obj, depsgraph=context.evaluated_depsgraph_get()))
+
+                    self.log(f" Created alternative object {dup.name} for {obj.name}")
 
     def _remove_alternatives(self):
         for obj in self.alternative:
             self.log(f" Removing alternave object {obj.name}")
+            bvh_cache.remove(obj.data.session_uid)
+            snap_cache.remove(obj)
             bpy.data.meshes.remove(obj.data, do_unlink=True)
 
+        self.snapshots = []
+
     def _update_meshes(self, context):
         '''
         update edit mesh objects so the latest state is available on the object/scene level
@@ -223,6 +366,9 @@ class Snap:
 
             mod.show_viewport = False
 
+        # don't wait for the depsgraph dispatcher, the next hit may come before it runs
+        snap_cache.invalidate({obj for obj, _ in self._modifiers})
+
     def _enable_modifiers(self):
         '''
         re-enable all edit mesh object modifiers
@@ -233,6 +379,264 @@ class Snap:
 
             mod.show_viewport = True
 
+        snap_cache.invalidate({obj for obj, _ in self._modifiers})
+
+
+class SnapGeometry:
+    '''
+    lean, array based snapping representation of a mesh, read via foreach_get
+    no mesh datablocks or bmeshes are created, evaluated meshes are fetched via to_mesh() and cleared right away
+    '''
+
+    def __init__(self, obj, depsgraph=None, evaluated=True):
+        if evaluated and depsgraph:
+            obj_eval = obj.evaluated_get(depsgraph)
+            mesh = obj_eval.to_mesh()
+
+        else:
+            obj_eval = None
+            mesh = obj.data
+
+        self.coords, self.tris, self.tri_polygons = get_triangle_arrays(mesh)
+
+        self.face_count = len(mesh.polygons)
+        loop_count = len(mesh.loops)
+
+        # FACE > TRIS
+
+        # the triangles of face i are tris[tri_order[tri_offsets[i]:tri_offsets[i + 1]]]
+        self.tri_order = np.argsort(self.tri_polygons, kind='stable')
+        self.tri_offsets = np.zeros(self.face_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.tri_polygons, minlength=self.face_count), out=self.tri_offsets[1:])
+
+        # FACE > LOOPS
+
+        self.loop_starts = np.empty(self.face_count, dtype=np.int32)
+        mesh.polygons.foreach_get('loop_start', self.loop_starts)
+
+        self.loop_totals = np.empty(self.face_count, dtype=np.int32)
+        mesh.polygons.foreach_get('loop_total', self.loop_totals)
+
+        self.loop_verts = np.empty(loop_count, dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', self.loop_verts)
+
+        self.loop_edges = np.empty(loop_count, dtype=np.int32)
+        mesh.loops.foreach_get('edge_index', self.loop_edges)
+
+        self.normals = np.empty((self.face_count, 3), dtype=np.float32)
+        mesh.polygons.foreach_get('normal', self.normals.ravel())
+
+        # EDGES
+
+        self.edges = np.empty((len(mesh.edges), 2), dtype=np.int32)
+        mesh.edges.foreach_get('vertices', self.edges.ravel())
+
+        if obj_eval:
+            obj_eval.to_mesh_clear()
+
+        # built on demand, see get_kdtree() and get_edges_in_range()
+        self.kdtree = None
+        self.edge_buckets = None
+
+        # rough estimate, including the KD-trees of the verts and edge centers, once built
+        self.size = sum(array.nbytes for array in [self.coords, self.tris, self.tri_polygons, self.tri_order, self.tri_offsets, self.loop_starts, self.loop_totals, self.loop_verts, self.loop_edges, self.normals, self.edges]) + 32 * (len(self.coords) + len(self.edges))
+
+    def get_kdtree(self):
+        '''
+        KD-tree of all verts in local space, built on first use
+        '''
+
+        if self.kdtree is None:
+            self.kdtree = KDTree(len(self.coords))
+
+            for idx, co in enumerate(self.coords.tolist()):
+                self.kdtree.insert(co, idx)
+
+            self.kdtree.balance()
+
+        return self.kdtree
+
+    def get_edges_in_range(self, co, radius):
+        '''
+        get the indices of all edges passing within the radius of the local space co, via the edge segment index built on first use
+        edges are bucketed by length, with a KD-tree of edge centers per bucket, an edge can only be in range, if its center is within the radius plus half its length
+        so each bucket is queried with the radius plus its longest half length, and the candidates are then filtered by their exact distance
+        '''
+
+        if self.edge_buckets is None:
+            centers = (self.coords[self.edges[:, 0]] + self.coords[self.edges[:, 1]]) / 2
+            halves = np.linalg.norm(self.coords[self.edges[:, 1]] - self.coords[self.edges[:, 0]], axis=1) / 2
+
+            # bucket by power of two half lengths, so long edges don't widen the queries for all the short ones
+            keys = np.ceil(np.log2(np.maximum(halves, 1e-6))).astype(np.int32)
+
+            self.edge_buckets = []
+
+            for key in np.unique(keys):
+                bucket_edges = np.flatnonzero(keys == key).astype(np.int32)
+
+                kdtree = KDTree(len(bucket_edges))
+
+                for idx, center in enumerate(centers[bucket_edges].tolist()):
+                    kdtree.insert(center, idx)
+
+                kdtree.balance()
+
+                self.edge_buckets.append((kdtree, bucket_edges, float(halves[bucket_edges].max())))
+
+        candidates = np.array([bucket_edges[idx] for kdtree, bucket_edges, half in self.edge_buckets for _, idx, _ in kdtree.find_range(co, radius + half)], dtype=np.int32)
+
+        if not len(candidates):
+            return candidates
+
+        # exact point to segment distances
+        starts = self.coords[self.edges[candidates, 0]]
+        edge_dirs = self.coords[self.edges[candidates, 1]] - starts
+
+        lengths_squared = np.einsum('ij,ij->i', edge_dirs, edge_dirs)
+        factors = np.einsum('ij,ij->i', np.array(co, dtype=np.float32) - starts, edge_dirs) / np.maximum(lengths_squared, 1e-12)
+        np.clip(factors, 0, 1, out=factors)
+
+        distances = np.linalg.norm(starts + edge_dirs * factors[:, np.newaxis] - np.array(co, dtype=np.float32), axis=1)
+
+        return candidates[distances <= radius]
+
+    def get_face_edges(self, index):
+        start = self.loop_starts[index]
+        return self.loop_edges[start:start + self.loop_totals[index]]
+
+    def get_face(self, index):
+        '''
+        get a SnapFace for the passed in face index, in the object's local space
+        '''
+
+        start = self.loop_starts[index]
+        end = start + self.loop_totals[index]
+
+        return SnapFace(index, self.coords[self.loop_verts[start:end]], self.normals[index], self.loop_verts[start:end], self.loop_edges[start:end], range(start, end))
+
+    def get_tri_coords(self, index, mx):
+        '''
+        get the world space tri coords of a single face, without touching the triangles of any other face
+        '''
+
+        face_tris = self.tris[self.tri_order[self.tri_offsets[index]:self.tri_offsets[index + 1]]]
+        face_coords = self.coords[face_tris.ravel()] @ np.array(mx.to_3x3(), dtype=np.float32).T + np.array(mx.translation, dtype=np.float32)
+
+        return [Vector(co) for co in face_coords]
+
+
+class SnapSnapshot:
+    '''
+    static stand-in for an alternative object, usually an edit mesh object that's being modified while snapping
+    its mesh is frozen into a SnapGeometry and a BVH built from the same arrays, so no scene objects are created, or have their visibility toggled
+    with a depsgraph, the evaluated mesh of the source object is frozen instead, which is how hidden duplicates keep their modifiers, as they aren't evaluated themselves
+    '''
+
+    def __init__(self, obj, source=None, depsgraph=None):
+        self.obj = obj
+
+        self.geometry = SnapGeometry(source or obj, depsgraph=depsgraph, evaluated=bool(depsgraph))
+        self.bvh = BVHTree.FromPolygons(self.geometry.coords.tolist(), self.geometry.tris.tolist(), all_triangles=True)
+
+    def ray_cast(self, origin, direction, distance=1.84467e19):
+        '''
+        like BVHTree.ray_cast(), in the object's local space, but returning the polygon index instead of the triangle index
+        '''
+
+        location, normal, index, distance = self.bvh.ray_cast(origin, direction, distance)
+
+        if index is not None:
+            index = int(self.geometry.tri_polygons[index])
+
+        return location, normal, index, distance
+
+
+class SnapVert:
+    '''
+    stand in for a BMVert of a SnapFace
+    '''
+
+    def __init__(self, index, co):
+        self.index = index
+        self.co = co
+
+
+class SnapEdge:
+    '''
+    stand in for a BMEdge of a SnapFace, its verts are in the face's loop order
+    '''
+
+    def __init__(self, index, verts):
+        self.index = index
+        self.verts = verts
+
+    def calc_length(self):
+        return (self.verts[1].co - self.verts[0].co).length
+
+    def other_vert(self, vert):
+        if vert in self.verts:
+            return self.verts[1] if vert == self.verts[0] else self.verts[0]
+
+
+class SnapLoop:
+    '''
+    stand in for a BMLoop of a SnapFace
+    '''
+
+    def __init__(self, index, vert, edge, face):
+        self.index = index
+        self.vert = vert
+        self.edge = edge
+        self.face = face
+
+
+class SnapFace:
+    '''
+    stand in for the BMFace, that used to be snapped on, in the object's local space
+    like a BMFace it has an index, a normal, and verts, edges and loops in loop order, with co, verts, vert and edge attributes, as well as the calc_*() methods commonly used on the hitface
+    the vert coords are also available as a numpy array in coords
+    '''
+
+    def __init__(self, index, coords, normal, vert_indices, edge_indices, loop_indices):
+        self.index = index
+        self.name = None
+
+        self.coords = coords
+        self.normal = Vector(normal)
+
+        self.verts = [SnapVert(int(vidx), Vector(co)) for vidx, co in zip(vert_indices, coords)]
+        self.edges = [SnapEdge(int(eidx), (self.verts[idx], self.verts[(idx + 1) % len(self.verts)])) for idx, eidx in enumerate(edge_indices)]
+        self.loops = [SnapLoop(int(lidx), vert, edge, self) for lidx, vert, edge in zip(loop_indices, self.verts, self.edges)]
+
+        self.center = self.calc_center_median_weighted()
+
+    def calc_center_median(self):
+        return Vector(self.coords.mean(axis=0))
+
+    def calc_center_median_weighted(self):
+        '''
+        like BMFace.calc_center_median_weighted(), each vert is weighted by the length of its two adjacent edges
+        '''
+
+        lengths = np.linalg.norm(np.roll(self.coords, -1, axis=0) - self.coords, axis=1)
+        weights = lengths + np.roll(lengths, 1)
+
+        if weights.sum() == 0:
+            return self.calc_center_median()
+
+        return Vector((self.coords * weights[:, None]).sum(axis=0) / weights.sum())
+
+    def calc_perimeter(self):
+        return float(np.linalg.norm(np.roll(self.coords, -1, axis=0) - self.coords, axis=1).sum())
+
+    def calc_area(self):
+        '''
+        the length of the sum of the cross products of consecutive verts, which is twice the area of a planar polygon
+        '''
+
+        return float(np.linalg.norm(np.cross(self.coords, np.roll(self.coords, -1, axis=0)).sum(axis=0)) / 2)
+
 
 class SnapCache:
     def log(self, *args, **kwargs):
@@ -242,30 +646,104 @@ class SnapCache:
     debug = False
 
     objects = {}
-    meshes = {}
-
-    bmeshes = {}
+    geometry = {}
 
-    loop_triangles = {}
     tri_coords = {}
 
     def __init__(self, debug=False):
         self.debug = debug
         self.log(" Initialize SnappingCache")
 
-    def clear(self):
-        for name, mesh in self.meshes.items():
-            self.log(f" Removing {name}'s temporary snapping mesh {mesh.name} with {len(mesh.polygons)} faces and {len(mesh.vertices)} verts")
-            bpy.data.meshes.remove(mesh, do_unlink=True)
+    def add_geometry(self, name, obj, depsgraph, evaluated=True):
+        '''
+        fetch the object's snapping geometry from the session wide snap_cache, which only builds it if necessary
+        '''
 
-        for name, bm in self.bmeshes.items():
-            self.log(f" Freeing {name}'s temporary snapping bmesh")
-            bm.free()
+        geometry = snap_cache.get(obj, depsgraph, evaluated=evaluated)
+        self.geometry[name] = geometry
 
-        self.objects.clear()
-        self.meshes.clear()
+        self.log(f" Using {name}'s snapping geometry with {geometry.face_count} faces and {len(geometry.coords)} verts")
+
+    def clear(self):
+        '''
+        clear the references of this snapping session, the geometry itself remains cached in snap_cache
+        '''
 
-        self.bmeshes.clear()
+        self.objects.clear()
+        self.geometry.clear()
 
-        self.loop_triangles.clear()
         self.tri_coords.clear()
+
+
+class SnapGeometryCache:
+    '''
+    session wide cache of SnapGeometry, shared by all Snap instances, so consecutive snapping operations on an unchanged scene don't rebuild anything
+    entries are keyed on the object, and are rebuilt once its mesh's geometry version changes
+    objects whose evaluated geometry changes, like when modifiers are added or removed, are invalidated by the depsgraph dispatcher
+    frame changes don't run through the dispatcher, but can change any evaluated geometry via armatures, shape keys or animated modifiers, so all evaluated entries are dropped on frame_change_post
+    entries are evicted least recently used first, once the memory budget set in the addon preferences is exceeded
+    '''
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, obj, depsgraph, evaluated=True):
+        key = obj.session_uid
+        version = get_geometry_version(obj.data)
+
+        entry = self.entries.get(key)
+
+        if entry and entry[0] == version and entry[1] == evaluated:
+            self.entries.move_to_end(key)
+            return entry[2]
+
+        if entry:
+            self.remove(obj)
+
+        geometry = SnapGeometry(obj, depsgraph=depsgraph, evaluated=evaluated)
+
+        self.entries[key] = (version, evaluated, geometry)
+        self.size += geometry.size
+
+        self.evict(keep=key)
+
+        return geometry
+
+    def evict(self, keep=None):
+        budget = get_prefs().snap_cache_budget * 1024 ** 2
+
+        for key in list(self.entries):
+            if self.size <= budget:
+                break
+
+            if key != keep:
+                self._pop(key)
+
+    def invalidate(self, objects):
+        for obj in objects:
+            self._pop(obj.session_uid)
+
+    def invalidate_evaluated(self):
+        '''
+        drop all entries built from evaluated meshes, those built from original meshes don't change with the frame
+        '''
+
+        for key in [key for key, entry in self.entries.items() if entry[1]]:
+            self._pop(key)
+
+    def remove(self, obj):
+        self._pop(obj.session_uid)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+
+        if entry:
+            self.size -= entry[2].size
+
+
+snap_cache = SnapGeometryCache()
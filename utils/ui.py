@@ -1,6 +1,7 @@
 import bpy
 import rna_keymap_ui
 from mathutils import Vector
+import numpy as np
 from bpy_extras.view3d_utils import region_2d_to_location_3d, location_3d_to_region_2d
 from bl_ui.space_statusbar import STATUSBAR_HT_header as statusbar
 
@@ -119,6 +120,20 @@ def get_zoom_factor(context, depth_location, scale=10, ignore_obj_scale=False):
     return (center_3d - offset_3d).length
 
 
+def get_zoom_factors(context, depth_locations, scale=10):
+    '''
+    vectorized get_zoom_factor() for an (N, 3) array of locations, always ignoring object scale
+    the world space length of a horizontal pixel offset at a location's depth is proportional to the location's clip space w
+    '''
+
+    pmx = np.array(context.region_data.perspective_matrix, dtype=np.float32)
+    wmx = context.region_data.window_matrix
+
+    w = np.abs(depth_locations @ pmx[3, :3] + pmx[3, 3])
+
+    return scale * 2 * w / (context.region.width * wmx[0][0])
+
+
 # HUD
 
 def get_flick_direction(context, mouse_loc_3d, flick_vector, axes):